@@ -36,10 +36,19 @@ app.get('/', async (req, res) => {
   res.send("Welcome to the Mongoose API");
 });
 
-// All reviews
+// All reviews, in id order; ?after_id=N&limit=M returns one page of the
+// reviews with id > N (used by the Django review mirror's incremental sync)
 app.get('/fetchReviews', async (req, res) => {
   try {
-    const documents = await Reviews.find();
+    const filter = {};
+    if (req.query.after_id !== undefined) {
+      filter.id = { $gt: Number(req.query.after_id) };
+    }
+    let query = Reviews.find(filter).sort({ id: 1 });
+    if (req.query.limit !== undefined) {
+      query = query.limit(Number(req.query.limit));
+    }
+    const documents = await query;
     res.json(documents);
   } catch (error) {
     res.status(500).json({ error: 'Error fetching documents' });
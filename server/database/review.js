@@ -6,6 +6,7 @@ const reviews = new Schema({
 	id: {
     type: Number,
     required: true,
+    index: true,
 	},
 	name: {
     type: String,
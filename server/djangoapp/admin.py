@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import CarMake, CarModel
+from .models import (
+    CarMake, CarModel, DealerSentiment, MirroredReview, ReviewSentiment, ReviewSubmission,
+)
 
 
 class CarModelInline(admin.TabularInline):
@@ -19,3 +21,34 @@ class CarModelAdmin(admin.ModelAdmin):
     list_display = ('name', 'make', 'type', 'year', 'dealer_id')
     list_filter = ('make', 'type', 'year')
     search_fields = ('name', 'make__name')
+
+
+@admin.register(ReviewSentiment)
+class ReviewSentimentAdmin(admin.ModelAdmin):
+    list_display = ('review_id', 'dealer_id', 'label', 'compound', 'scored_at')
+    list_filter = ('label',)
+    search_fields = ('review_id', 'dealer_id')
+
+
+@admin.register(ReviewSubmission)
+class ReviewSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('tracking_id', 'user', 'status', 'attempts', 'review_id', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('tracking_id', 'review_id')
+    readonly_fields = ('tracking_id', 'created_at', 'delivered_at')
+
+
+@admin.register(MirroredReview)
+class MirroredReviewAdmin(admin.ModelAdmin):
+    list_display = ('review_id', 'dealer_id', 'synced_at')
+    search_fields = ('review_id', 'dealer_id')
+    readonly_fields = ('synced_at',)
+
+
+@admin.register(DealerSentiment)
+class DealerSentimentAdmin(admin.ModelAdmin):
+    list_display = ('dealer_id', 'state', 'positive', 'neutral', 'negative', 'mean_compound',
+                    'updated_at')
+    list_filter = ('state',)
+    search_fields = ('dealer_id',)
+    readonly_fields = ('updated_at',)
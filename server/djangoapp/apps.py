@@ -1,5 +1,49 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def seed_cars(sender, using="default", **kwargs):
+    """Load the starter car catalog once, right after migrate, if it is empty."""
+    from django.db import transaction
+    from .models import CarMake
+    from .populate import initiate
+    # In a transaction, so the seed's reads are not routed to the replica
+    # (see db_router), which may not be migrated yet, e.g. in test setup.
+    with transaction.atomic(using=using):
+        if not CarMake.objects.using(using).exists():
+            initiate()
+
+
+def create_cache_tables(sender, using="default", **kwargs):
+    """Create the missing tables of the database caches (see CACHES)."""
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+    existing = set(connections[using].introspection.table_names())
+    missing = [
+        conf["LOCATION"] for conf in settings.CACHES.values()
+        if conf["BACKEND"].endswith(".DatabaseCache") and conf["LOCATION"] not in existing
+    ]
+    if missing:
+        call_command("createcachetable", *missing, database=using, verbosity=0)
 
 
 class DjangoappConfig(AppConfig):
     name = 'djangoapp'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from .auth_backends import forget_user
+        from .conditional import bump_cars_version
+        from .models import CarMake, CarModel
+        post_migrate.connect(seed_cars, sender=self)
+        post_migrate.connect(create_cache_tables, sender=self)
+        # Car ETags (see conditional.cars_version) change with the car tables.
+        for model in (CarMake, CarModel):
+            for signal in (post_save, post_delete):
+                signal.connect(bump_cars_version, sender=model,
+                               dispatch_uid=f"bump_cars_version.{signal}.{model.__name__}")
+        # Cached users (see auth_backends.CachedModelBackend) go stale on change.
+        for signal in (post_save, post_delete):
+            signal.connect(forget_user, sender=get_user_model(),
+                           dispatch_uid=f"forget_user.{signal}")
@@ -0,0 +1,64 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+USER_CACHE_ALIAS = "auth"
+
+# What the cache keeps of a user: request.user's attributes, but not the
+# password hash. That field is left deferred on the restored user, so a
+# save() cannot overwrite it, and only the session hash derived from it
+# (what AuthenticationMiddleware checks) is cached.
+CACHED_FIELDS = (
+    "id", "username", "first_name", "last_name", "email",
+    "is_active", "is_staff", "is_superuser", "last_login", "date_joined",
+)
+
+
+def user_key(user_id):
+    return f"djangoapp:user:{user_id}"
+
+
+def forget_user(sender, instance, **kwargs):
+    """post_save/post_delete receiver: drop the cached copy of a user."""
+    caches[USER_CACHE_ALIAS].delete(user_key(instance.pk))
+
+
+def _snapshot(user):
+    return {
+        "fields": {f: getattr(user, f) for f in CACHED_FIELDS if hasattr(user, f)},
+        "session_hash": user.get_session_auth_hash(),
+    }
+
+
+def _restore(entry):
+    fields = entry["fields"]
+    model = get_user_model()
+    # from_db() takes the values in the model's field order.
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in fields]
+    user = model.from_db(DEFAULT_DB_ALIAS, names, [fields[name] for name in names])
+    session_hash = entry["session_hash"]
+    user.get_session_auth_hash = lambda: session_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user() (run for every authenticated request by
+    AuthenticationMiddleware) is answered from the cache; a miss falls
+    back to the database. Saving or deleting a user evicts it.
+    """
+
+    def get_user(self, user_id):
+        cache = caches[USER_CACHE_ALIAS]
+        entry = cache.get(user_key(user_id))
+        if entry is not None:
+            return _restore(entry)
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(user_key(user_id), _snapshot(user))
+        return user
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
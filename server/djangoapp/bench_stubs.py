@@ -0,0 +1,204 @@
+"""
+Local stand-ins for the upstream services, used by `manage.py benchmark`.
+
+StubBackend answers the Node backend's routes (/fetchDealers,
+/fetchDealer/:id, /fetchReviews, /insert_review, ...) from a seeded
+synthetic data set; StubSentiment answers /analyze/<text> and
+/analyze_batch. Both add a configurable delay to every request so upstream
+latency can be dialled in, and bind to 127.0.0.1 on a free port.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+STATES = (
+    ("Texas", "TX", 31.0, -100.0), ("California", "CA", 36.7, -119.4),
+    ("New York", "NY", 42.9, -75.5), ("Kansas", "KS", 38.5, -98.0),
+    ("Florida", "FL", 28.0, -81.7), ("Minnesota", "MN", 46.3, -94.3),
+)
+WORDS = (
+    "great service friendly staff terrible wait price fair car clean fast slow "
+    "helpful rude honest love hate recommend avoid smooth easy pushy"
+).split()
+MAKES = (("Audi", "A6"), ("Kia", "Sorrento"), ("Toyota", "Camry"), ("NISSAN", "Qashqai"))
+
+
+def synthetic_data(dealers=50, reviews_per_dealer=20, review_words=12, seed=7):
+    """(dealers, reviews) shaped like database/data/*.json."""
+    rng = random.Random(seed)
+    dealer_rows = []
+    for i in range(1, dealers + 1):
+        state, st, lat, lon = STATES[i % len(STATES)]
+        dealer_rows.append({
+            "id": i, "city": f"City {i}", "state": state, "st": st,
+            "address": f"{i} Main Street", "zip": f"{10000 + i}",
+            "lat": round(lat + rng.uniform(-3, 3), 4),
+            "long": round(lon + rng.uniform(-3, 3), 4),
+            "short_name": f"Dealer{i}", "full_name": f"Dealer{i} Car Dealership",
+        })
+    review_rows = []
+    for dealer in dealer_rows:
+        for _ in range(reviews_per_dealer):
+            make, model = rng.choice(MAKES)
+            review_rows.append({
+                "id": len(review_rows) + 1,
+                "name": f"Reviewer {len(review_rows) + 1}",
+                "dealership": dealer["id"],
+                "review": " ".join(rng.choice(WORDS) for _ in range(review_words)),
+                "purchase": True,
+                "purchase_date": "07/11/2020",
+                "car_make": make, "car_model": model, "car_year": 2020,
+            })
+    return dealer_rows, review_rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub = None  # set per server subclass
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def handle_any(self, method):
+        self.stub.wait()
+        parts = urlsplit(self.path)
+        try:
+            found = self.stub.route(method, unquote(parts.path), parse_qs(parts.query), self)
+        except Exception as err:
+            return self.send_json({"error": str(err)}, 500)
+        if found is None:
+            return self.send_json({"error": "Not found"}, 404)
+        return self.send_json(*found) if isinstance(found, tuple) else self.send_json(found)
+
+    def do_GET(self):
+        self.handle_any("GET")
+
+    def do_POST(self):
+        self.handle_any("POST")
+
+
+class _Stub:
+    """A ThreadingHTTPServer on a free local port, served from a thread."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"stub": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        # Clients that time out hang up mid-reply; that is expected here.
+        self.server.handle_error = lambda request, client_address: None
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def wait(self):
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubBackend(_Stub):
+    def __init__(self, dealers, reviews, **kwargs):
+        super().__init__(**kwargs)
+        self.dealers = dealers
+        self.reviews = list(reviews)
+        self.by_dealer = {}
+        for review in self.reviews:
+            self.by_dealer.setdefault(review["dealership"], []).append(review)
+
+    def route(self, method, path, query, handler):
+        segments = path.strip("/").split("/")
+        head = segments[0]
+        if method == "POST" and head == "insert_review":
+            review = dict(handler.read_json())
+            with self._lock:
+                review["id"] = len(self.reviews) + 1
+                self.reviews.append(review)
+            return review
+        if method != "GET":
+            return None
+        if head == "fetchDealers" and len(segments) == 1:
+            return self.dealers
+        if head == "fetchDealers":
+            state = segments[1].lower()
+            return [d for d in self.dealers if d["state"].lower() == state]
+        if head == "fetchDealer" and len(segments) == 2:
+            dealer_id = int(segments[1])
+            found = [d for d in self.dealers if d["id"] == dealer_id]
+            return found[0] if found else ({"error": "Dealer not found"}, 404)
+        if head == "fetchReviews" and len(segments) == 3 and segments[1] == "dealer":
+            return self.by_dealer.get(int(segments[2]), [])
+        if head == "fetchReviews" and len(segments) == 1:
+            rows = self.reviews
+            if "after_id" in query:
+                after = int(query["after_id"][0])
+                rows = [r for r in rows if r["id"] > after]
+            if "limit" in query:
+                rows = rows[:int(query["limit"][0])]
+            return rows
+        return None
+
+
+class StubSentiment(_Stub):
+    NEGATIVE = {"terrible", "slow", "rude", "hate", "avoid", "pushy"}
+
+    def score(self, text):
+        words = (text or "").lower().split()
+        neg = sum(w in self.NEGATIVE for w in words) / (len(words) or 1)
+        label = "negative" if neg > 0.3 else "positive" if neg < 0.1 else "neutral"
+        return {
+            "sentiment": label,
+            "scores": {"compound": round(0.5 - neg, 4), "pos": round(1 - neg, 4),
+                       "neg": round(neg, 4), "neu": 0.0},
+        }
+
+    def route(self, method, path, query, handler):
+        if method == "GET" and path.startswith("/analyze/"):
+            return {"sentiment": self.score(path[len("/analyze/"):])["sentiment"]}
+        if method == "POST" and path.rstrip("/") == "/analyze_batch":
+            body = handler.read_json()
+            items = body.get("texts", []) if isinstance(body, dict) else body
+            results = []
+            for index, item in enumerate(items):
+                text = item.get("text") if isinstance(item, dict) else item
+                item_id = item.get("id", index) if isinstance(item, dict) else index
+                results.append({"id": item_id, **self.score(text)})
+            return {"results": results}
+        return None
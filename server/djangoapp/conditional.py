@@ -0,0 +1,107 @@
+"""
+Conditional GET support for the JSON views.
+
+Each view names its data with an ETag that is cheap to get: a digest of
+the upstream payload (memoized per payload object, since cached payloads
+are shared and never mutated), a version token for the local car
+tables, kept in the database (DataVersion) so every process sees it, or
+the version of a dealer's mirrored reviews (review_mirror.version()).
+conditional_json() answers a matching If-None-Match with 304 before the
+response body is built or serialized.
+"""
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .instrumentation import JsonResponse
+
+_digests = OrderedDict()  # id(payload) -> (payload, digest)
+_digests_lock = threading.Lock()
+_DIGESTS_MAX = 1024
+
+
+def digest(payload):
+    """Short content digest of a JSON-serializable payload."""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(body.encode(), digest_size=12).hexdigest()
+
+
+def payload_digest(payload):
+    """
+    digest() memoized on the payload object itself, for payloads that are
+    held and reused (directory entries, dealer_cache values). The memo keeps
+    a reference to each payload so its id cannot be reused while cached.
+    """
+    key = id(payload)
+    with _digests_lock:
+        found = _digests.get(key)
+        if found is not None and found[0] is payload:
+            _digests.move_to_end(key)
+            return found[1]
+    value = digest(payload)
+    with _digests_lock:
+        _digests[key] = (payload, value)
+        while len(_digests) > _DIGESTS_MAX:
+            _digests.popitem(last=False)
+    return value
+
+
+def cars_version():
+    """
+    Token that changes whenever CarMake/CarModel rows change. It is read
+    from the database so a change made by any process (another worker,
+    the admin, `manage.py import_cars`) shows at once everywhere.
+    """
+    from .models import DataVersion
+    token = DataVersion.objects.filter(name=DataVersion.CARS).values_list(
+        "token", flat=True
+    ).first()
+    return token if token is not None else bump_cars_version()
+
+
+def bump_cars_version(**kwargs):
+    """
+    Signal receiver (and helper for bulk writes): invalidate car ETags.
+    Runs in the writer's transaction, if any, so the token changes with
+    the rows it describes.
+    """
+    from .models import DataVersion
+    token = uuid.uuid4().hex
+    DataVersion.objects.update_or_create(name=DataVersion.CARS, defaults={"token": token})
+    return token
+
+
+def _tagged(response, etag, cache_control):
+    response["ETag"] = etag
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def not_modified(request, etag, **cache_control):
+    """The 304 response if If-None-Match matches `etag`, else None."""
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    return None if response is None else _tagged(response, etag, cache_control)
+
+
+def conditional_json(request, etag, build, **cache_control):
+    """
+    304 if the request's If-None-Match matches `etag`; otherwise a
+    JsonResponse of build(). Both carry the ETag and Cache-Control headers.
+    With etag None (data without a cheap version, e.g. read from a
+    fallback source) build() runs first and the ETag is its digest.
+    """
+    body = None
+    if etag is None:
+        body = build()
+        etag = digest(body)
+    response = not_modified(request, etag, **cache_control)
+    if response is not None:
+        return response
+    return _tagged(JsonResponse(build() if body is None else body), quote_etag(etag),
+                   cache_control)
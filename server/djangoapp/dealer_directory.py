@@ -0,0 +1,209 @@
+import heapq
+import logging
+import math
+import os
+import time
+
+from .refreshable import Refreshable
+
+logger = logging.getLogger(__name__)
+
+# Rebuild the directory from /fetchDealers in the background once it is
+# older than this.
+dealer_directory_refresh_seconds = int(
+    os.getenv('dealer_directory_refresh_seconds', default="300")
+)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+class _KDTree:
+    """
+    3-d tree over points on the unit sphere. Straight-line (chord) distance
+    between unit vectors grows monotonically with great-circle distance,
+    so nearest-neighbour and radius searches on it are exact on the globe,
+    with no special cases near the poles or the antimeridian.
+    """
+
+    def __init__(self, points):
+        # points: list of ((x, y, z), payload)
+        self.root = self._build(points, 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        return (
+            points[mid], axis,
+            self._build(points[:mid], depth + 1),
+            self._build(points[mid + 1:], depth + 1),
+        )
+
+    def within(self, target, radius):
+        """(chord distance, payload) for every point within `radius`."""
+        found = []
+        stack = [self.root]
+        limit = radius * radius
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            (point, payload), axis, left, right = node
+            d2 = sum((a - b) ** 2 for a, b in zip(point, target))
+            if d2 <= limit:
+                found.append((math.sqrt(d2), payload))
+            diff = target[axis] - point[axis]
+            stack.append(left if diff < 0 else right)
+            if diff * diff <= limit:
+                stack.append(right if diff < 0 else left)
+        return found
+
+    def nearest(self, target, k, radius=None):
+        """Up to k (chord distance, payload) pairs, closest first."""
+        best = []  # max-heap of (-d2, tiebreak, payload)
+        limit = float("inf") if radius is None else radius * radius
+
+        def visit(node):
+            if node is None:
+                return
+            (point, payload), axis, left, right = node
+            d2 = sum((a - b) ** 2 for a, b in zip(point, target))
+            if d2 <= limit:
+                entry = (-d2, id(payload), payload)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, entry)
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            bound = limit if len(best) < k else min(limit, -best[0][0])
+            if diff * diff <= bound:
+                visit(far)
+
+        visit(self.root)
+        return sorted(((math.sqrt(-d2), payload) for d2, _, payload in best),
+                      key=lambda found: found[0])
+
+
+class DealerDirectory:
+    """
+    Immutable in-process copy of the dealer list with lookup indexes:
+    by id, by full state name and by state abbreviation (both
+    case-insensitive), plus a spatial index over lat/long.
+    """
+
+    def __init__(self, dealers):
+        self.loaded_at = time.time()
+        self.dealers = list(dealers)
+        self.by_id = {}
+        self.by_state = {}
+        self.by_st = {}
+        points = []
+        for dealer in self.dealers:
+            if dealer.get("id") is not None:
+                self.by_id[int(dealer["id"])] = dealer
+            self.by_state.setdefault(str(dealer.get("state", "")).lower(), []).append(dealer)
+            self.by_st.setdefault(str(dealer.get("st", "")).lower(), []).append(dealer)
+            try:
+                # The backend schema stores lat/long as strings.
+                lat, lon = float(dealer["lat"]), float(dealer["long"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            points.append((_unit_vector(lat, lon), dealer))
+        self.located = len(points)
+        self.tree = _KDTree(points)
+
+    def get(self, dealer_id):
+        return self.by_id.get(int(dealer_id))
+
+    def in_state(self, state):
+        """Dealers in a state given by full name or abbreviation."""
+        key = state.lower()
+        return self.by_state.get(key) or self.by_st.get(key) or []
+
+    def near(self, lat, lon, radius_km=None, k=None):
+        """
+        Dealers around (lat, lon), closest first, each paired with its
+        great-circle distance in km: the k nearest (optionally capped at
+        radius_km), or every dealer within radius_km when k is None.
+        """
+        target = _unit_vector(lat, lon)
+        radius = None if radius_km is None else _km_to_chord(radius_km)
+        if k is None:
+            found = sorted(self.tree.within(target, radius), key=lambda f: f[0])
+        else:
+            found = self.tree.nearest(target, k, radius)
+        return [(dealer, _chord_to_km(chord)) for chord, dealer in found]
+
+    def stats(self):
+        return {
+            "dealers": len(self.dealers),
+            "located": self.located,
+            "states": len(self.by_state),
+            "loaded_at": self.loaded_at,
+        }
+
+
+def _load_directory():
+    from .restapis import get_request
+    dealers = get_request("/fetchDealers")
+    if dealers is None:
+        return None
+    directory = DealerDirectory(dealers)
+    logger.info("Dealer directory loaded: %s dealers", len(directory.dealers))
+    _assign_states(directory)
+    return directory
+
+
+def _assign_states(directory):
+    """Dealers may have moved state: update the sentiment rollups' copy."""
+    from .sentiment_rollup import assign_states
+    try:
+        assign_states(directory)
+    except Exception:
+        logger.exception("Could not update sentiment rollup states")
+
+
+_directory = Refreshable("dealer-directory", _load_directory, dealer_directory_refresh_seconds)
+
+
+def refresh_directory():
+    """Fetch /fetchDealers and swap in a new directory; None on failure."""
+    return _directory.refresh()
+
+
+def invalidate_directory():
+    """Mark the directory stale so the next read triggers a refresh."""
+    _directory.invalidate()
+
+
+def get_directory(block=True):
+    """
+    The current directory, refreshed in the background when stale.
+    If none has been loaded yet it is fetched inline (block=True) or in
+    the background (block=False, returning None meanwhile). Also None
+    when the backend cannot be reached for the first load.
+    """
+    return _directory.get(block)
+
+
+def stats():
+    """Stats of the loaded directory, or None before the first load."""
+    current = _directory.value
+    return current.stats() if current is not None else None
@@ -0,0 +1,247 @@
+"""
+Per-request timing for djangoapp views.
+
+RequestTimingMiddleware opens a RequestTimings for each request in a
+context variable. While it is open, upstream calls (upstream.py), ORM
+queries (a connection execute wrapper) and JSON encoding (JsonResponse
+below) add their durations to it. When the response is ready the totals
+go out as a Server-Timing header and a structured "djangoapp.timing" log
+record, and the request duration feeds a rolling per-view histogram
+reported by stats().
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django import http
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("djangoapp.timing")
+
+# Request durations kept per view for the percentiles.
+timing_window = int(os.getenv('timing_window', default="1000"))
+
+_current = contextvars.ContextVar("request_timings", default=None)
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestTimings:
+    """Call counts and seconds per span name for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}  # name -> [count, seconds]
+        self._lock = threading.Lock()  # pool threads record concurrently
+
+    def add(self, name, seconds):
+        with self._lock:
+            span = self.spans.setdefault(name, [0, 0.0])
+            span[0] += 1
+            span[1] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def record(name, seconds):
+    """Add `seconds` under `name` to the current request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def upstream_route(method, url):
+    """Method and path of an upstream call, ids collapsed: "GET /fetchDealer/:id"."""
+    path = url.split("://", 1)[-1].partition("/")[2].partition("?")[0]
+    return f"{method} " + _ID_SEGMENT.sub("/:id", "/" + path)
+
+
+def upstream_span(method, url):
+    """Span name for an upstream call: "upstream GET /fetchDealer/:id"."""
+    return "upstream " + upstream_route(method, url)
+
+
+def bind(fn):
+    """
+    Wrap fn so it records into the calling request when it runs on another
+    thread, e.g. in a ThreadPoolExecutor (which does not copy contextvars).
+    """
+    timings = _current.get()
+
+    @wraps(fn)
+    def bound(*args, **kwargs):
+        token = _current.set(timings)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return bound
+
+
+# ------------------------
+# ORM and JSON hooks
+# ------------------------
+
+
+def _time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record("db", time.perf_counter() - started)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver: time every query on the new connection."""
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid="djangoapp.timing.db")
+
+
+class TimedJSONEncoder(DjangoJSONEncoder):
+    def encode(self, o):
+        started = time.perf_counter()
+        try:
+            return super().encode(o)
+        finally:
+            record("json", time.perf_counter() - started)
+
+
+class JsonResponse(http.JsonResponse):
+    """django.http.JsonResponse whose encoding time is recorded."""
+
+    def __init__(self, data, encoder=TimedJSONEncoder, **kwargs):
+        super().__init__(data, encoder=encoder, **kwargs)
+
+
+# ------------------------
+# Per-view histograms
+# ------------------------
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(view, seconds):
+    with _histograms_lock:
+        samples = _histograms.get(view)
+        if samples is None:
+            samples = _histograms[view] = [0, deque(maxlen=timing_window)]
+        samples[0] += 1
+        samples[1].append(seconds)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stats():
+    """Per view: request count and p50/p95/p99/max (ms) over the window."""
+    with _histograms_lock:
+        snapshot = {view: (count, list(window)) for view, (count, window) in _histograms.items()}
+    views = {}
+    for view, (count, window) in sorted(snapshot.items()):
+        window.sort()
+        views[view] = {
+            "requests": count,
+            "window": len(window),
+            **{
+                name: round(_percentile(window, fraction) * 1000, 2)
+                for name, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99))
+            },
+            "max_ms": round(window[-1] * 1000, 2),
+        }
+    return views
+
+
+# ------------------------
+# Middleware
+# ------------------------
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per record, including a request's "timing" extra."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if hasattr(record, "timing"):
+            entry["timing"] = record.timing
+        return json.dumps(entry)
+
+
+def server_timing(timings, total):
+    """Server-Timing header value for a finished request."""
+    parts = []
+    for name, (count, seconds) in timings.spans.items():
+        token = _TOKEN_UNSAFE.sub("-", name).strip("-")
+        parts.append(f'{token};dur={seconds * 1000:.1f};desc="{name} x{count}"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class RequestTimingMiddleware:
+    """Collects RequestTimings for every request; sync and async capable."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def _finish(self, request, response, timings):
+        total = timings.elapsed()
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        observe(view, total)
+        response["Server-Timing"] = server_timing(timings, total)
+        logger.info(
+            "%s %s %s %.1fms", request.method, request.path, response.status_code, total * 1000,
+            extra={"timing": {
+                "view": view,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+                "spans": {
+                    name: {"count": count, "ms": round(seconds * 1000, 2)}
+                    for name, (count, seconds) in timings.spans.items()
+                },
+            }},
+        )
+        return response
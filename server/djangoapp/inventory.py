@@ -0,0 +1,249 @@
+import logging
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+
+from .jsonstream import iter_json_file
+from .refreshable import Refreshable
+
+logger = logging.getLogger(__name__)
+
+# Where inventory rows come from: a backend endpoint returning a list of
+# cars (inventory_endpoint, e.g. "/fetchCars") if set, else a local file in
+# car_records.json format.
+inventory_endpoint = os.getenv('inventory_endpoint', default="")
+inventory_file = os.getenv(
+    'inventory_file',
+    default=str(settings.BASE_DIR / "database" / "data" / "car_records.json"),
+)
+# Rebuild the index in the background once it is older than this.
+inventory_refresh_seconds = int(os.getenv('inventory_refresh_seconds', default="600"))
+
+SORT_FIELDS = ("year", "mileage")
+_EMPTY = array("i")
+
+
+class _Strings:
+    """Interning table: each distinct (case-insensitive) string gets a code."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        key = (value or "").lower()
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value or "")
+        return code
+
+    def lookup(self, value):
+        return self.codes.get((value or "").lower())
+
+
+class InventoryIndex:
+    """
+    Immutable, column-oriented index over dealer inventory rows.
+
+    Each attribute is one typed array indexed by row number; strings are
+    interned to small integer codes. dealer_id, make, model and body type
+    have hash indexes (value -> row numbers), year and mileage have sorted
+    indexes answered with bisect. A query starts from its most selective
+    index and checks the remaining filters against the columns, so it
+    never scans rows that no index narrowed down to.
+    """
+
+    def __init__(self, records, source=""):
+        self.source = source
+        self.loaded_at = time.time()
+        self.makes, self.models, self.body_types = _Strings(), _Strings(), _Strings()
+        self.dealer_id, self.year, self.mileage = array("i"), array("i"), array("i")
+        self.make, self.model, self.body_type = array("i"), array("i"), array("i")
+
+        started = time.perf_counter()
+        for record in records:
+            self.dealer_id.append(int(record.get("dealer_id") or 0))
+            self.year.append(int(record.get("year") or 0))
+            self.mileage.append(int(record.get("mileage") or 0))
+            self.make.append(self.makes.code(record.get("make")))
+            self.model.append(self.models.code(record.get("model")))
+            self.body_type.append(self.body_types.code(record.get("bodyType")))
+
+        self.by_dealer = self._hash_index(self.dealer_id)
+        self.by_make = self._hash_index(self.make)
+        self.by_model = self._hash_index(self.model)
+        self.by_body_type = self._hash_index(self.body_type)
+        self.sorted = {field: self._sorted_index(getattr(self, field)) for field in SORT_FIELDS}
+        self.build_seconds = time.perf_counter() - started
+
+    def __len__(self):
+        return len(self.year)
+
+    @staticmethod
+    def _hash_index(column):
+        index = {}
+        for row, value in enumerate(column):
+            rows = index.get(value)
+            if rows is None:
+                rows = index[value] = array("i")
+            rows.append(row)
+        return index
+
+    @staticmethod
+    def _sorted_index(column):
+        order = array("i", sorted(range(len(column)), key=column.__getitem__))
+        keys = array("i", (column[row] for row in order))
+        return keys, order
+
+    def _range(self, field, low, high):
+        keys, order = self.sorted[field]
+        start = 0 if low is None else bisect_left(keys, low)
+        stop = len(keys) if high is None else bisect_right(keys, high)
+        return order[start:stop]
+
+    def row(self, row):
+        return {
+            "dealer_id": self.dealer_id[row],
+            "make": self.makes.values[self.make[row]],
+            "model": self.models.values[self.model[row]],
+            "bodyType": self.body_types.values[self.body_type[row]],
+            "year": self.year[row],
+            "mileage": self.mileage[row],
+        }
+
+    def query(self, dealer_id=None, make=None, model=None, body_type=None,
+              year_min=None, year_max=None, mileage_min=None, mileage_max=None,
+              sort=None, limit=50, offset=0):
+        """
+        Matching rows as (total, [row dicts]) for one page.
+        sort is "year", "mileage", or either prefixed with "-" for
+        descending order; without it rows come back in source order.
+        """
+        descending = bool(sort) and sort.startswith("-")
+        sort_field = sort.lstrip("-") if sort else None
+        if sort_field is not None and sort_field not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+
+        # One (candidate rows, column, low, high) per filter. The shortest
+        # candidate list drives the query; the other filters are checked
+        # against their columns for just those rows.
+        candidates = []
+        checks = []
+        for value, strings, index, column in (
+            (make, self.makes, self.by_make, self.make),
+            (model, self.models, self.by_model, self.model),
+            (body_type, self.body_types, self.by_body_type, self.body_type),
+        ):
+            if value:
+                code = strings.lookup(value)
+                if code is None:
+                    return 0, []
+                candidates.append((index.get(code, _EMPTY), column, code, code))
+        if dealer_id is not None:
+            candidates.append(
+                (self.by_dealer.get(dealer_id, _EMPTY), self.dealer_id, dealer_id, dealer_id)
+            )
+        for field, low, high in (("year", year_min, year_max),
+                                 ("mileage", mileage_min, mileage_max)):
+            if low is not None or high is not None:
+                column = getattr(self, field)
+                candidates.append((
+                    self._range(field, low, high), column,
+                    -sys.maxsize if low is None else low,
+                    sys.maxsize if high is None else high,
+                ))
+
+        if candidates:
+            driver = min(candidates, key=lambda c: len(c[0]))
+            checks = [c[1:] for c in candidates if c is not driver]
+            rows = driver[0]
+            presorted = sort_field is not None and driver[1] is getattr(self, sort_field)
+        elif sort_field is not None:
+            rows = self.sorted[sort_field][1]
+            presorted = True
+        else:
+            rows = range(len(self))
+            presorted = True
+
+        matches = [
+            row for row in rows
+            if all(low <= column[row] <= high for column, low, high in checks)
+        ]
+        if sort_field is not None:
+            if not presorted:
+                matches.sort(key=getattr(self, sort_field).__getitem__)
+            if descending:
+                matches.reverse()
+        page = matches[offset:offset + limit]
+        return len(matches), [self.row(row) for row in page]
+
+    def stats(self):
+        columns = (self.dealer_id, self.year, self.mileage,
+                   self.make, self.model, self.body_type)
+        column_bytes = sum(col.itemsize * len(col) for col in columns)
+        index_bytes = sum(
+            sys.getsizeof(rows) for index in
+            (self.by_dealer, self.by_make, self.by_model, self.by_body_type)
+            for rows in index.values()
+        ) + sum(sys.getsizeof(k) + sys.getsizeof(o) for k, o in self.sorted.values())
+        count = len(self) or 1
+        return {
+            "records": len(self),
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "build_ms": round(self.build_seconds * 1000, 2),
+            "column_bytes_per_record": round(column_bytes / count, 1),
+            "index_bytes_per_record": round(index_bytes / count, 1),
+            "distinct": {
+                "dealers": len(self.by_dealer),
+                "makes": len(self.makes.values),
+                "models": len(self.models.values),
+                "body_types": len(self.body_types.values),
+            },
+        }
+
+
+def load_records():
+    """Inventory records from the configured upstream endpoint or file."""
+    if inventory_endpoint:
+        from .restapis import get_request
+        records = get_request(inventory_endpoint)
+        if records is None:
+            raise RuntimeError(f"Could not fetch inventory from {inventory_endpoint}")
+        return records, inventory_endpoint
+    return iter_json_file(inventory_file, key="cars"), inventory_file
+
+
+def _build_index():
+    records, source = load_records()
+    index = InventoryIndex(records, source=source)
+    logger.info("Inventory index loaded: %s rows from %s", len(index), source)
+    return index
+
+
+# Readers see either the old or the new index, never a partial one: a new
+# index is built aside and swapped in with a single assignment.
+_index = Refreshable("inventory", _build_index, inventory_refresh_seconds)
+
+
+def refresh_inventory():
+    """Build a fresh index from the source and swap it in. Returns it."""
+    return _index.refresh()
+
+
+def get_inventory():
+    """The current index; built on first use, refreshed in the background."""
+    return _index.get()
+
+
+def stats():
+    """Stats of the loaded index, or None before the first load."""
+    current = _index.value
+    return current.stats() if current is not None else None
@@ -0,0 +1,147 @@
+"""
+Incremental parsing and encoding of large JSON arrays.
+
+iter_json_array() yields the elements of a JSON array one at a time from
+an iterable of text or byte chunks (an open file, response.iter_content(),
+...). Only the element being decoded is held in memory, never the whole
+document. iter_json_dump() is the reverse: it encodes an iterable as a
+JSON array chunk by chunk, e.g. for a StreamingHttpResponse.
+"""
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters that may follow a complete value in valid JSON.
+_TERMINATORS = _WHITESPACE + ",:]}"
+# Consumed input is dropped from the buffer once this many chars pile up.
+_COMPACT_AT = 1 << 16
+
+
+class _Reader:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next non-empty chunk; False once input is exhausted."""
+        if self.eof:
+            return False
+        if self.pos >= _COMPACT_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, (bytes, bytearray)):
+                chunk = self._decode(chunk)
+            if chunk:
+                self.buf += chunk
+                return True
+        self.buf += self._decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace char without consuming it ("" at end)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one JSON value, reading more input until it is complete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number may be cut short by a chunk boundary ("12" of
+                # "12.5e3"), so only trust a value once a terminator
+                # follows it or the input is over.
+                if self.eof or (end < len(self.buf) and self.buf[end] in _TERMINATORS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_array(chunks, key=None):
+    """
+    Yield the elements of a JSON array read from `chunks`.
+    With `key`, the document is an object and the array is the value of
+    that top-level key, e.g. key="cars" for {"cars": [...]}.
+    """
+    reader = _Reader(chunks)
+    if key is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise KeyError(key)
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' at offset {reader.pos - 1}")
+
+
+def iter_json_file(path, key=None, chunk_size=1 << 16):
+    """iter_json_array() over a file, read `chunk_size` bytes at a time."""
+    with open(path, "rb") as fh:
+        yield from iter_json_array(iter(lambda: fh.read(chunk_size), b""), key)
+
+
+def iter_json_dump(items, key=None, fields=None, encoder=json.JSONEncoder,
+                   chunk_size=1 << 16):
+    """
+    Encode `items` as a JSON array, yielding utf-8 chunks of about
+    `chunk_size` bytes. With `key`, the array is wrapped in an object
+    after `fields`: key="dealers", fields={"status": 200} streams
+    {"status": 200, "dealers": [...]}. Items are consumed lazily, one at a
+    time.
+    """
+    encode = encoder().encode
+    if key is None:
+        head, tail = "[", "]"
+    else:
+        # The empty document ends in '[]}': split it around the array.
+        empty = encode({**(fields or {}), key: []})
+        head, tail = empty[:-2], "]}"
+    parts = [head]
+    size = len(head)
+    separator = ""
+    for item in items:
+        text = encode(item)
+        parts.append(separator)
+        parts.append(text)
+        separator = ", "
+        size += len(text) + 2
+        if size >= chunk_size:
+            yield "".join(parts).encode()
+            parts = []
+            size = 0
+    parts.append(tail)
+    yield "".join(parts).encode()
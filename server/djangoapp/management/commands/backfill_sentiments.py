@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.models import ReviewSentiment
+from djangoapp.restapis import analyze_review_sentiments_batch, get_request
+from djangoapp.sentiment_store import save_results
+
+
+class Command(BaseCommand):
+    help = "Score every upstream review that has no stored sentiment yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Reviews scored and written per round (default 500).",
+        )
+        parser.add_argument(
+            "--dealer", type=int,
+            help="Only backfill reviews of this dealer.",
+        )
+        parser.add_argument(
+            "--rescore", action="store_true",
+            help="Score reviews again even if they already have a stored score.",
+        )
+
+    def handle(self, *args, **options):
+        dealer_id = options["dealer"]
+        endpoint = f"/fetchReviews/dealer/{dealer_id}" if dealer_id else "/fetchReviews"
+        reviews = get_request(endpoint)
+        if reviews is None:
+            raise CommandError(f"Could not fetch reviews from {endpoint}")
+
+        reviews = [r for r in reviews if r.get("id") is not None]
+        if not options["rescore"]:
+            done = set(
+                ReviewSentiment.objects.filter(
+                    review_id__in=[r["id"] for r in reviews]
+                ).values_list("review_id", flat=True)
+            )
+            reviews = [r for r in reviews if r["id"] not in done]
+
+        size = max(1, options["batch_size"])
+        started = time.perf_counter()
+        written = failed = 0
+        for start in range(0, len(reviews), size):
+            batch = reviews[start:start + size]
+            results = analyze_review_sentiments_batch(
+                [r.get("review", "") or "" for r in batch]
+            )
+            written += save_results(zip(batch, results))
+            failed += sum(1 for res in results if res is None)
+            self.stdout.write(f"{start + len(batch)}/{len(reviews)} reviews processed")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {written} sentiments ({failed} failed) in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+
+from djangoapp import restapis, review_spool, urls
+from djangoapp.bench_stubs import StubBackend, StubSentiment, synthetic_data
+
+REVIEW = {
+    "name": "Bench User", "dealership": 1, "review": "great service, fair price",
+    "purchase": True, "purchase_date": "07/11/2020",
+    "car_make": "Audi", "car_model": "A6", "car_year": 2020,
+}
+
+# One request per djangoapp URL name: method, path kwargs, query string,
+# JSON body and who is logged in (None, "user" or "staff").
+SCENARIOS = {
+    "login": ("POST", {}, "", {"userName": "bench", "password": "bench-pass"}, None),
+    "logout": ("GET", {}, "", None, "user"),
+    "getcars": ("GET", {}, "", None, None),
+    "car_catalog": ("GET", {}, "?type=SUV&limit=20", None, None),
+    "inventory": ("GET", {}, "?dealer_id=1&sort=-year&limit=20", None, None),
+    "get_dealers": ("GET", {}, "", None, None),
+    "get_dealers_by_state": ("GET", {"state": "Texas"}, "", None, None),
+    "get_dealers_near": ("GET", {}, "?lat=31.0&long=-100.0&k=5", None, None),
+    "invalidate_dealer_cache": ("POST", {}, "?dealer_id=1", None, "staff"),
+    "get_dealer": ("GET", {"dealer_id": 1}, "", None, None),
+    "get_dealer_reviews": ("GET", {"dealer_id": 1}, "", None, None),
+    "dealer_page": ("GET", {"dealer_id": 1}, "", None, None),
+    "dealer_sentiment": ("GET", {"dealer_id": 1}, "", None, None),
+    "sentiment_leaderboard": ("GET", {}, "?n=10", None, None),
+    "sentiment_leaderboard_by_state": ("GET", {"state": "Texas"}, "?n=10", None, None),
+    "add_review": ("POST", {}, "", REVIEW, "user"),
+    "submit_review": ("POST", {}, "", REVIEW, "user"),
+    # tracking_id: a submission spooled before the run
+    "review_submission": ("GET", {"tracking_id": None}, "", None, "staff"),
+    "get_dealers_async": ("GET", {}, "", None, None),
+    "get_dealers_by_state_async": ("GET", {"state": "Texas"}, "", None, None),
+    "get_dealer_async": ("GET", {"dealer_id": 1}, "", None, None),
+    "get_dealer_reviews_async": ("GET", {"dealer_id": 1}, "", None, None),
+    "dealer_page_async": ("GET", {"dealer_id": 1}, "", None, None),
+    "add_review_async": ("POST", {}, "", REVIEW, "user"),
+    "metrics": ("GET", {}, "", None, None),
+    "upstream_state": ("GET", {}, "", None, None),
+}
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _failed(response):
+    """HTTP error, or a 200 whose JSON body reports an error status."""
+    if response.status_code >= 400:
+        return True
+    if response.get("Content-Type", "").startswith("application/json"):
+        status = json.loads(response.content).get("status")
+        return isinstance(status, int) and status >= 400
+    return False
+
+
+@contextmanager
+def isolated_environment(backend, sentiment):
+    """
+    A throwaway database with two users ("bench" and staff "bench-staff",
+    password "bench-pass"), in-process caches (the auth cache as
+    configured), the upstream URLs pointed at `backend` and `sentiment`,
+    and per-request timing logs silenced.
+    """
+    # Per-request timing records would flood the output.
+    timing_logger = logging.getLogger("djangoapp.timing")
+    timing_level = timing_logger.level
+    timing_logger.setLevel(logging.WARNING)
+    setup_test_environment()
+    # The auth cache stays as configured, so benchmark_db measures it.
+    caches = {alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+              for alias in ("default", "sentiment")}
+    caches["auth"] = settings.CACHES["auth"]
+    # For SQLite a file rather than the shared in-memory test database,
+    # which locks whole tables under concurrency.
+    workdir = tempfile.TemporaryDirectory(prefix="djangoapp-bench-")
+    if connections["default"].vendor == "sqlite":
+        test_settings = connections["default"].settings_dict.setdefault("TEST", {})
+        test_settings["NAME"] = str(Path(workdir.name) / "bench.sqlite3")
+    # Test database setup runs createcachetable at its default verbosity;
+    # keep its notes off stdout, which carries only the JSON report.
+    with redirect_stdout(sys.stderr):
+        old_databases = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+    old_urls = restapis.backend_url, restapis.sentiment_analyzer_url
+    restapis.backend_url = backend.url
+    restapis.sentiment_analyzer_url = sentiment.url + "/"
+    try:
+        with override_settings(CACHES=caches):
+            User.objects.create_user("bench", password="bench-pass")
+            User.objects.create_user("bench-staff", password="bench-pass", is_staff=True)
+            yield
+    finally:
+        restapis.backend_url, restapis.sentiment_analyzer_url = old_urls
+        connections.close_all()
+        teardown_databases(old_databases, verbosity=0)
+        workdir.cleanup()
+        teardown_test_environment()
+        timing_logger.setLevel(timing_level)
+
+
+def settle_spool(timeout=30):
+    """Let the review spool deliver what a run queued before the next one."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        counts = review_spool.counts()
+        if not counts.get("pending") and not counts.get("sending"):
+            return
+        if review_spool.review_spool_worker:
+            review_spool.wake()
+        else:
+            review_spool.drain_once()
+        time.sleep(0.1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every djangoapp URL against local stand-ins for the backend and "
+        "sentiment services and print throughput and latency as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Timed requests per URL (default 200).")
+        parser.add_argument("--concurrency", type=int, default=8,
+                            help="Client threads per URL (default 8).")
+        parser.add_argument("--warmup", type=int, default=5,
+                            help="Untimed requests per URL first (default 5).")
+        parser.add_argument("--latency-ms", type=float, default=20.0,
+                            help="Delay added by the stand-in servers (default 20).")
+        parser.add_argument("--jitter-ms", type=float, default=0.0,
+                            help="Extra random delay, 0..jitter (default 0).")
+        parser.add_argument("--dealers", type=int, default=50)
+        parser.add_argument("--reviews-per-dealer", type=int, default=20)
+        parser.add_argument("--review-words", type=int, default=12)
+        parser.add_argument("--sentiment", choices=("stub", "real"), default="stub",
+                            help="Stand-in or the real Flask sentiment service "
+                                 "(needs nltk and the VADER lexicon).")
+        parser.add_argument("--only", nargs="+", metavar="URL_NAME",
+                            help="Benchmark only these URL names.")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        names = [p.name for p in urls.urlpatterns]
+        if options["only"]:
+            unknown = set(options["only"]) - set(names)
+            if unknown:
+                raise CommandError(f"Unknown URL names: {', '.join(sorted(unknown))}")
+            names = [n for n in names if n in options["only"]]
+
+        dealers, reviews = synthetic_data(
+            options["dealers"], options["reviews_per_dealer"], options["review_words"]
+        )
+        latency = {"latency_ms": options["latency_ms"], "jitter_ms": options["jitter_ms"]}
+        backend = StubBackend(dealers, reviews, **latency).start()
+        sentiment = self._sentiment_service(options["sentiment"], latency)
+
+        try:
+            with isolated_environment(backend, sentiment):
+                results = {}
+                for name in names:
+                    if name not in SCENARIOS:
+                        results[name] = {"skipped": "no scenario for this URL"}
+                        continue
+                    results[name] = self._run(name, backend, sentiment, options)
+                    settle_spool()
+                    self.stderr.write(f"{name}: {results[name].get('rps')} req/s")
+        finally:
+            backend.stop()
+            sentiment.stop()
+
+        report = json.dumps({
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cpus": os.cpu_count(),
+            "config": {key: options[key] for key in (
+                "requests", "concurrency", "warmup", "latency_ms", "jitter_ms",
+                "dealers", "reviews_per_dealer", "review_words", "sentiment",
+            )},
+            "results": results,
+        }, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(report + "\n")
+        self.stdout.write(report)
+
+    def _sentiment_service(self, kind, latency):
+        if kind == "stub":
+            return StubSentiment(**latency).start()
+        service_dir = Path(restapis.__file__).resolve().parent / "microservices"
+        os.environ.setdefault("NLTK_DATA", str(service_dir))
+        sys.path.insert(0, str(service_dir))
+        try:
+            from werkzeug.serving import make_server
+            import app as sentiment_app
+        except ImportError as err:
+            raise CommandError(f"Cannot load the sentiment service: {err}")
+
+        class RealSentiment:
+            def __init__(self):
+                self.server = make_server("127.0.0.1", 0, sentiment_app.app, threaded=True)
+                self.url = f"http://127.0.0.1:{self.server.server_port}"
+                self.requests = None  # not counted for the real service
+                threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+            def stop(self):
+                self.server.shutdown()
+
+        return RealSentiment()
+
+    def _client(self, role):
+        client = Client()
+        if role is not None:
+            client.force_login(User.objects.get(username="bench-staff" if role == "staff"
+                                                else "bench"))
+        return client
+
+    def _request(self, client, name, kwargs):
+        method, _, query, body, _ = SCENARIOS[name]
+        path = reverse(f"djangoapp:{name}", kwargs=kwargs or None) + query
+        if method == "POST":
+            return client.post(path, data=json.dumps(body or {}),
+                               content_type="application/json")
+        return client.get(path)
+
+    def _run(self, name, backend, sentiment, options):
+        kwargs, role = SCENARIOS[name][1], SCENARIOS[name][4]
+        if "tracking_id" in kwargs:
+            kwargs = {"tracking_id": review_spool.submit(REVIEW).tracking_id}
+        for _ in range(options["warmup"]):
+            self._request(self._client(role), name, kwargs)
+
+        total = max(1, options["requests"])
+        workers = max(1, min(options["concurrency"], total))
+        latencies = []
+        errors = []
+        remaining = [total]
+        lock = threading.Lock()
+        upstream_before = backend.requests, sentiment.requests
+
+        def worker():
+            client = self._client(role)
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    response = self._request(client, name, kwargs)
+                    error = f"HTTP {response.status_code}" if _failed(response) else None
+                except Exception as err:
+                    error = f"{type(err).__name__}: {err}"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if error:
+                        errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        result = {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "seconds": round(wall, 3),
+            "rps": round(len(latencies) / wall, 1),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "backend_requests": backend.requests - upstream_before[0],
+        }
+        if errors:
+            result["first_error"] = errors[0]
+        if sentiment.requests is not None:
+            result["sentiment_requests"] = sentiment.requests - upstream_before[1]
+        return result
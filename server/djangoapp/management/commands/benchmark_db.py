@@ -0,0 +1,157 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from djangoapp import review_spool
+from djangoapp.bench_stubs import StubBackend, StubSentiment, synthetic_data
+from djangoapp.management.commands.benchmark import (
+    REVIEW, _failed, _git_commit, _percentile, isolated_environment, settle_spool,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed read/write load on the database through authenticated requests "
+        "(review submissions, submission status reads, catalog reads); "
+        "--compare runs it with db_tuning off and on."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8,
+                            help="Concurrent clients (default 8).")
+        parser.add_argument("--seconds", type=float, default=5.0,
+                            help="Duration of the timed run (default 5).")
+        parser.add_argument("--write-ratio", type=float, default=0.2,
+                            help="Share of requests that write (default 0.2).")
+        parser.add_argument("--compare", action="store_true",
+                            help="Run once per db_tuning setting, each in a fresh process.")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            report = self._compare(options)
+        else:
+            report = {
+                "commit": _git_commit(),
+                "db_tuning": settings.DB_TUNING,
+                "config": {k: options[k] for k in ("threads", "seconds", "write_ratio")},
+                "result": self._measure(options),
+            }
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
+
+    def _compare(self, options):
+        runs = {}
+        for tuning in ("off", "on"):
+            argv = [
+                sys.executable, sys.argv[0], "benchmark_db",
+                "--threads", str(options["threads"]),
+                "--seconds", str(options["seconds"]),
+                "--write-ratio", str(options["write_ratio"]),
+            ]
+            done = subprocess.run(argv, capture_output=True, text=True,
+                                  env={**os.environ, "db_tuning": tuning})
+            if done.returncode:
+                raise CommandError(f"db_tuning={tuning} run failed:\n{done.stderr}")
+            runs[tuning] = json.loads(done.stdout)["result"]
+            self.stderr.write(f"db_tuning={tuning}: {runs[tuning]['rps']} req/s, "
+                              f"{runs[tuning]['errors']} errors")
+        return {
+            "commit": _git_commit(),
+            "config": {k: options[k] for k in ("threads", "seconds", "write_ratio")},
+            "off": runs["off"],
+            "on": runs["on"],
+            "rps_ratio": round(runs["on"]["rps"] / max(runs["off"]["rps"], 0.001), 2),
+        }
+
+    def _measure(self, options):
+        dealers, reviews = synthetic_data(10, 5)
+        backend = StubBackend(dealers, reviews).start()
+        sentiment = StubSentiment().start()
+        try:
+            with isolated_environment(backend, sentiment):
+                result = self._load(options)
+                settle_spool()
+                return result
+        finally:
+            backend.stop()
+            sentiment.stop()
+
+    def _load(self, options):
+        clock = {}
+        lock = threading.Lock()
+        samples = {"read": [], "write": []}
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            client = Client()
+            client.force_login(User.objects.get(username="bench"))
+            tracking = []
+            ready.wait()
+            while time.perf_counter() < clock["deadline"]:
+                kind = "write" if not tracking or rng.random() < options["write_ratio"] else "read"
+                started = time.perf_counter()
+                try:
+                    if kind == "write":
+                        response = client.post("/djangoapp/reviews/submit",
+                                               data=json.dumps(REVIEW),
+                                               content_type="application/json")
+                        if not _failed(response):
+                            tracking.append(json.loads(response.content)["tracking_id"])
+                    elif rng.random() < 0.5:
+                        response = client.get(
+                            f"/djangoapp/reviews/submissions/{rng.choice(tracking)}"
+                        )
+                    else:
+                        response = client.get("/djangoapp/car_catalog?limit=20")
+                    error = f"HTTP {response.status_code}" if _failed(response) else None
+                except Exception as err:
+                    error = f"{type(err).__name__}: {err}"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    samples[kind].append(elapsed)
+                    if error:
+                        errors.append(error)
+
+        def start_clock():
+            clock["started"] = time.perf_counter()
+            clock["deadline"] = clock["started"] + options["seconds"]
+
+        workers = max(1, options["threads"])
+        # Clients log in first; the clock starts once all of them have.
+        ready = threading.Barrier(workers, action=start_clock)
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - clock["started"]
+
+        result = {"requests": sum(len(v) for v in samples.values()), "errors": len(errors)}
+        result["rps"] = round(result["requests"] / wall, 1)
+        for kind, latencies in samples.items():
+            latencies.sort()
+            if latencies:
+                result[kind] = {
+                    "requests": len(latencies),
+                    "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+                    "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+                    "max_ms": round(latencies[-1] * 1000, 2),
+                }
+        if errors:
+            result["first_error"] = errors[0]
+        result["spool"] = review_spool.counts()
+        return result
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from djangoapp import review_spool
+
+
+class Command(BaseCommand):
+    help = "Deliver every due review in the write-behind spool, then exit."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=review_spool.review_spool_batch_size,
+            help="Reviews claimed per round (default review_spool_batch_size).",
+        )
+
+    def handle(self, *args, **options):
+        size = max(1, options["batch_size"])
+        delivered = failed = 0
+        while True:
+            ok, bad = review_spool.drain_once(size)
+            delivered += ok
+            failed += bad
+            if ok + bad < size:
+                break
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {delivered} reviews ({failed} failed or rescheduled); "
+            f"spool: {review_spool.counts()}"
+        ))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.jsonstream import iter_json_file
+from djangoapp.populate import import_car_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream-import car records (database/data/car_records.json format) "
+        "into CarMake/CarModel with batched bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?",
+            default=str(settings.BASE_DIR / "database" / "data" / "car_records.json"),
+            help="JSON file to import (default: database/data/car_records.json).",
+        )
+        parser.add_argument(
+            "--key", default="cars",
+            help='Top-level key holding the record list; "" for a bare JSON array.',
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Records per bulk insert/transaction (default 1000).",
+        )
+        parser.add_argument(
+            "--update", action="store_true",
+            help="Overwrite type and dealer_id of models that already exist.",
+        )
+
+    def handle(self, *args, **options):
+        records = iter_json_file(options["path"], key=options["key"] or None)
+
+        def progress(count):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{count} records imported")
+
+        try:
+            stats = import_car_records(
+                records,
+                batch_size=options["batch_size"],
+                update=options["update"],
+                progress=progress,
+            )
+        except (OSError, ValueError, KeyError) as err:
+            raise CommandError(f"Could not import {options['path']}: {err!r}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['records']} records "
+            f"({stats['models_created']} new models) in {stats['seconds']:.2f}s "
+            f"- {stats['rows_per_sec']:.0f} rows/sec"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp import review_mirror
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy reviews added upstream since the last sync into the local review mirror "
+        "and score the ones without sentiment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=review_mirror.review_mirror_batch_size,
+            help="Reviews requested per page (default review_mirror_batch_size).",
+        )
+
+    def handle(self, *args, **options):
+        fetched = review_mirror.sync(options["batch_size"])
+        if fetched is None:
+            raise CommandError("Could not fetch reviews from /fetchReviews")
+        stats = review_mirror.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Fetched {fetched} reviews in {stats['last_sync']['pages']} pages, "
+            f"scored {stats['last_sync'].get('scored', 0)}; "
+            f"mirror cursor is now {stats['cursor']}"
+        ))
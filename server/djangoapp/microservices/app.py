@@ -1,35 +1,170 @@
-from flask import Flask
-from nltk.sentiment import SentimentIntensityAnalyzer
+from collections import deque
+from flask import Flask, Response, jsonify, request, stream_with_context
 import json
+import logging
+import os
+import time
+
+import batch_engine
 app = Flask("Sentiment Analyzer")
 
-sia = SentimentIntensityAnalyzer()
+logging.basicConfig(
+    level=os.getenv("log_level", default="INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("sentiment")
 
+_load_started = time.perf_counter()
+sia = batch_engine.get_analyzer()
+ANALYZER_LOAD_MS = round((time.perf_counter() - _load_started) * 1000, 2)
+logger.info("%s analyzer ready in %.1fms", batch_engine.ENGINE, ANALYZER_LOAD_MS)
 
-@app.get('/')
-def home():
-    return "Welcome to the Sentiment Analyzer. \
-    Use /analyze/text to get the sentiment"
+# Largest number of texts accepted by one /analyze_batch call.
+MAX_BATCH_SIZE = 1000
 
 
-@app.get('/analyze/<input_txt>')
-def analyze_sentiment(input_txt):
-
-    scores = sia.polarity_scores(input_txt)
-    print(scores)
+def label_for(scores):
+    """Map VADER pos/neg/neu scores to a positive/negative/neutral label."""
     pos = float(scores['pos'])
     neg = float(scores['neg'])
     neu = float(scores['neu'])
     res = "positive"
-    print("pos neg nue ", pos, neg, neu)
     if (neg > pos and neg > neu):
         res = "negative"
     elif (neu > neg and neu > pos):
         res = "neutral"
-    res = json.dumps({"sentiment": res})
-    print(res)
     return res
 
 
+@app.get('/')
+def home():
+    return "Welcome to the Sentiment Analyzer. \
+    Use /analyze/text to get the sentiment"
+
+
+@app.get('/ready')
+def ready():
+    """
+    Readiness probe: 200 once the analyzer is loaded and scores a known
+    text correctly, 503 otherwise.
+    """
+    try:
+        ok = label_for(sia.polarity_scores("good")) == "positive"
+    except Exception:
+        logger.exception("Readiness self-check failed")
+        ok = False
+    body = {
+        "ready": ok,
+        "engine": batch_engine.ENGINE,
+        "lexicon_entries": len(sia.lexicon),
+        "analyzer_load_ms": ANALYZER_LOAD_MS,
+    }
+    return jsonify(body), 200 if ok else 503
+
+
+@app.get('/analyze/<input_txt>')
+def analyze_sentiment(input_txt):
+
+    scores = sia.polarity_scores(input_txt)
+    res = label_for(scores)
+    logger.debug("scores %s -> %s", scores, res)
+    return json.dumps({"sentiment": res})
+
+
+def parse_item(index, item):
+    """(id, text) for a batch item; text is None if the item has none."""
+    if isinstance(item, dict):
+        item_id = item.get("id", index)
+        text = item.get("text")
+    else:
+        item_id = index
+        text = item
+    return item_id, text if isinstance(text, str) else None
+
+
+def _ndjson_items(stream):
+    for index, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield parse_item(index, json.loads(line))
+        except ValueError:
+            yield index, None
+
+
+@app.post('/analyze_stream')
+def analyze_stream():
+    """
+    Scores large jobs with the batch engine and streams NDJSON back.
+    Body: a JSON list like /analyze_batch, or NDJSON (one string or
+    {"id", "text"} object per line, Content-Type application/x-ndjson),
+    which is read incrementally. Query: workers, chunk_size (capped at
+    sentiment_max_workers and sentiment_max_chunk_size).
+    Each output line is {"id", "sentiment", "scores"}, in input order;
+    unusable items get {"id", "error"} instead.
+    """
+    if request.mimetype == "application/x-ndjson":
+        items = _ndjson_items(request.stream)
+    else:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get("texts")
+        if not isinstance(payload, list):
+            return jsonify({"error": "Expected a JSON list or NDJSON body"}), 400
+        items = (parse_item(i, item) for i, item in enumerate(payload))
+
+    workers = request.args.get("workers", type=int)
+    chunk_size = request.args.get("chunk_size", type=int)
+    ids = deque()
+
+    def texts():
+        for item_id, text in items:
+            ids.append((item_id, text is not None))
+            yield text or ""
+
+    def lines():
+        for scores in batch_engine.score_texts(texts(), workers, chunk_size):
+            item_id, valid = ids.popleft()
+            if valid:
+                row = {"id": item_id, "sentiment": label_for(scores), "scores": scores}
+            else:
+                row = {"id": item_id, "error": "Item has no text"}
+            yield json.dumps(row) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+
+@app.post('/analyze_batch')
+def analyze_batch():
+    """
+    Scores many texts in one call.
+    Body: a JSON list of strings or of {"id": ..., "text": ...} objects,
+    optionally wrapped as {"texts": [...]}.
+    Returns {"results": [{"id", "sentiment", "scores"}, ...]} in input order;
+    plain strings get their list index as id.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("texts")
+    if not isinstance(payload, list):
+        return jsonify({"error": "Expected a JSON list of texts"}), 400
+    if len(payload) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} texts per batch"}), 413
+
+    results = []
+    for index, item in enumerate(payload):
+        item_id, text = parse_item(index, item)
+        if text is None:
+            return jsonify({"error": f"Item {index} has no text"}), 400
+        scores = sia.polarity_scores(text)
+        results.append({
+            "id": item_id,
+            "sentiment": label_for(scores),
+            "scores": scores,
+        })
+    return jsonify({"results": results})
+
+
 if __name__ == "__main__":
     app.run(debug=True)
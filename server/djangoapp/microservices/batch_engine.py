@@ -0,0 +1,104 @@
+"""
+Batch scoring engine for large sentiment jobs.
+
+Texts are grouped into chunks. Each chunk is scored in one call, either in
+this process or on a pool of worker processes that each hold their own
+analyzer, so a large job can use every core. Inside a chunk, duplicate
+texts are scored once. Scores come straight from
+polarity_scores, so they are identical to the per-text /analyze path.
+Results are yielded in input order as soon as their chunk is done, which
+lets callers stream them.
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes for large jobs; 1 scores in-process.
+DEFAULT_WORKERS = int(os.getenv('sentiment_workers', default="1"))
+DEFAULT_CHUNK_SIZE = int(os.getenv('sentiment_chunk_size', default="500"))
+# Caps on what a caller may ask for: the shared pool has MAX_WORKERS
+# processes, whatever per-job worker counts are requested.
+MAX_WORKERS = max(1, int(os.getenv('sentiment_max_workers', default=str(os.cpu_count() or 1))))
+MAX_CHUNK_SIZE = int(os.getenv('sentiment_max_chunk_size', default="5000"))
+# "lite": vader_lite on the compiled lexicon (no NLTK import);
+# "nltk": nltk's SentimentIntensityAnalyzer. Both give identical scores.
+ENGINE = os.getenv('sentiment_engine', default="lite")
+
+_analyzer = None
+
+
+def get_analyzer():
+    """This process's analyzer (built on first use; see ENGINE)."""
+    global _analyzer
+    if _analyzer is None:
+        if ENGINE == "nltk":
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            _analyzer = SentimentIntensityAnalyzer()
+        else:
+            import vader_lite
+            _analyzer = vader_lite.load_analyzer()
+    return _analyzer
+
+
+def score_chunk(texts):
+    """polarity_scores for each text; repeated texts are scored once."""
+    polarity_scores = get_analyzer().polarity_scores
+    memo = {}
+    out = []
+    for text in texts:
+        scores = memo.get(text)
+        if scores is None:
+            scores = memo[text] = polarity_scores(text)
+        out.append(scores)
+    return out
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """The process pool shared by every job (MAX_WORKERS processes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=get_analyzer)
+        return _pool
+
+
+def score_texts(texts, workers=None, chunk_size=None):
+    """
+    Yield polarity_scores dicts for `texts` (any iterable), in order.
+    With workers > 1, chunks are scored on the shared process pool; at
+    most 2 * workers chunks are in flight, so memory stays bounded however
+    long the input is. workers and chunk_size are clamped to MAX_WORKERS
+    and MAX_CHUNK_SIZE.
+    """
+    workers = min(max(1, workers or DEFAULT_WORKERS), MAX_WORKERS)
+    chunk_size = min(max(1, chunk_size or DEFAULT_CHUNK_SIZE), MAX_CHUNK_SIZE)
+    chunks = _chunks(texts, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from score_chunk(chunk)
+        return
+
+    pool = _get_pool()
+    window = deque()
+    for chunk in chunks:
+        window.append(pool.submit(score_chunk, chunk))
+        if len(window) >= 2 * workers:
+            yield from window.popleft().result()
+    while window:
+        yield from window.popleft().result()
@@ -0,0 +1,76 @@
+"""
+Throughput benchmark for the batch scoring engine.
+
+Builds a synthetic corpus from the VADER lexicon, checks that the engine's
+output matches per-text polarity_scores exactly, and reports texts/sec for
+each worker count as JSON:
+
+    python bench_batch.py --texts 200000 --workers 1 2 4
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import batch_engine
+
+FILLER = "the car dealer service was and it but very not really quite".split()
+
+
+def synthetic_corpus(count, seed=7):
+    rng = random.Random(seed)
+    words = sorted(batch_engine.get_analyzer().lexicon)
+    corpus = []
+    for _ in range(count):
+        length = rng.randint(5, 30)
+        tokens = [rng.choice(words) if rng.random() < 0.3 else rng.choice(FILLER)
+                  for _ in range(length)]
+        if rng.random() < 0.2:
+            tokens[rng.randrange(length)] = rng.choice(words).upper() + "!"
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=batch_engine.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--verify", type=int, default=2000,
+                        help="texts to compare against per-text polarity_scores")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.texts)
+    sia = batch_engine.get_analyzer()
+    sample = corpus[:args.verify]
+    expected = [sia.polarity_scores(t) for t in sample]
+
+    runs = []
+    for workers in args.workers:
+        # Warm the pool so process start-up is not counted as scoring time.
+        list(batch_engine.score_texts(sample[:workers], workers, 1))
+        got = list(batch_engine.score_texts(sample, workers, args.chunk_size))
+        if got != expected:
+            raise SystemExit(f"workers={workers}: output differs from polarity_scores")
+        started = time.perf_counter()
+        scored = sum(1 for _ in batch_engine.score_texts(corpus, workers, args.chunk_size))
+        elapsed = time.perf_counter() - started
+        runs.append({
+            "workers": workers,
+            "texts": scored,
+            "seconds": round(elapsed, 3),
+            "texts_per_sec": round(scored / elapsed, 1),
+        })
+
+    print(json.dumps({
+        "cpus": os.cpu_count(),
+        "chunk_size": args.chunk_size,
+        "identical_to_polarity_scores": True,
+        "runs": runs,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
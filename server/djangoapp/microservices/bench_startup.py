@@ -0,0 +1,98 @@
+"""
+Cold-start benchmark for the sentiment service.
+
+Starts fresh interpreters and times, inside each, how long it takes to get
+a ready analyzer: NLTK's SentimentIntensityAnalyzer versus vader_lite on
+the compiled lexicon, both on their own and as a full import of app.py.
+Also checks that both engines score a synthetic corpus identically and
+prints everything as JSON:
+
+    python bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Each snippet prints {"ms": <time to a ready analyzer>, "maxrss_kb": ...}.
+CASES = {
+    "nltk_analyzer": (
+        "from nltk.sentiment import SentimentIntensityAnalyzer\n"
+        "SentimentIntensityAnalyzer()", {}),
+    "lite_analyzer": (
+        "import vader_lite\n"
+        "vader_lite.load_analyzer()", {}),
+    "app_nltk": ("import app", {"sentiment_engine": "nltk"}),
+    "app_lite": ("import app", {"sentiment_engine": "lite"}),
+}
+_WRAPPER = (
+    "import json, resource, time\n"
+    "started = time.perf_counter()\n"
+    "{code}\n"
+    "print(json.dumps({{'ms': (time.perf_counter() - started) * 1000,\n"
+    "    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))\n"
+)
+
+
+def run_case(code, env_overrides):
+    env = dict(os.environ, NLTK_DATA=os.environ.get("NLTK_DATA", HERE),
+               log_level="WARNING", **env_overrides)
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", _WRAPPER.format(code=code)],
+        cwd=HERE, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    wall = (time.perf_counter() - started) * 1000
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_ms"] = wall
+    return result
+
+
+def check_identical(texts):
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    import vader_lite
+    lite = vader_lite.load_analyzer()
+    reference = SentimentIntensityAnalyzer()
+    return all(lite.polarity_scores(t) == reference.polarity_scores(t) for t in texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--verify", type=int, default=20000,
+                        help="synthetic texts scored by both engines")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NLTK_DATA", HERE)
+    import lexicon_build
+    if not lexicon_build.is_current():
+        lexicon_build.compile_lexicon()
+
+    results = {}
+    for name, (code, env) in CASES.items():
+        runs = [run_case(code, env) for _ in range(args.runs)]
+        results[name] = {
+            "median_ms": round(statistics.median(r["ms"] for r in runs), 1),
+            "min_ms": round(min(r["ms"] for r in runs), 1),
+            "median_process_ms": round(statistics.median(r["process_ms"] for r in runs), 1),
+            "maxrss_kb": max(r["maxrss_kb"] for r in runs),
+        }
+
+    from bench_batch import synthetic_corpus
+    print(json.dumps({
+        "runs": args.runs,
+        "results": results,
+        "speedup_app": round(
+            results["app_nltk"]["median_ms"] / results["app_lite"]["median_ms"], 1
+        ),
+        "identical_scores": check_identical(synthetic_corpus(args.verify)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compile the VADER lexicon into a compact binary file.
+
+The lexicon ships as text inside sentiment/vader_lexicon.zip; NLTK unzips
+and parses all of it every time an analyzer is built. This build step does
+that once and writes sentiment/vader_lexicon.bin:
+
+    magic     8 bytes   b"VADERLX1"
+    count     uint32    number of entries
+    blob_len  uint32    length of the word blob in bytes
+    src_crc   uint32    CRC-32 of the lexicon text in the zip
+    src_size  uint32    size of the lexicon text in the zip
+    values    count x float64 (native byte order), one per word
+    blob      the words, UTF-8, joined by "\\n", in lexicon order
+
+Loading is one mmap, a copy of the value block into an array and a split
+of the word blob; nothing is parsed line by line and NLTK is not imported.
+Run it at image build time:
+
+    python lexicon_build.py
+"""
+import array
+import mmap
+import os
+import struct
+import sys
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(HERE, "sentiment", "vader_lexicon.zip")
+MEMBER = "vader_lexicon/vader_lexicon.txt"
+COMPILED = os.path.join(HERE, "sentiment", "vader_lexicon.bin")
+
+MAGIC = b"VADERLX1"
+_HEADER = struct.Struct("=8sIIII")
+
+
+def read_source(path=SOURCE):
+    """The lexicon text from the zip, decoded the way nltk.data.load does."""
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(MEMBER).decode("utf-8")
+
+
+def source_stamp(path=SOURCE):
+    """(CRC-32, size) of the lexicon text, read from the zip directory only."""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(MEMBER)
+    return info.CRC, info.file_size
+
+
+def parse(text):
+    """(words, values) in file order, parsed exactly like NLTK's make_lex_dict."""
+    entries = {}
+    for line in text.split("\n"):
+        word, measure = line.strip().split("\t")[0:2]
+        entries[word] = float(measure)
+    return list(entries), list(entries.values())
+
+
+def compile_lexicon(source=SOURCE, target=COMPILED):
+    """Write the binary lexicon for `source` to `target`; returns the entry count."""
+    words, values = parse(read_source(source))
+    blob = "\n".join(words).encode("utf-8")
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(words), len(blob), *source_stamp(source)))
+        fh.write(array.array("d", values).tobytes())
+        fh.write(blob)
+    os.replace(tmp, target)  # readers never see a half-written file
+    return len(words)
+
+
+def load_lexicon(path=COMPILED):
+    """
+    word -> valence dict from a compiled lexicon. The file is read through
+    mmap, so concurrent workers share its pages in the OS page cache, and a
+    dict loaded before forking is shared copy-on-write.
+    """
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count, blob_len, _, _ = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled VADER lexicon")
+        start = _HEADER.size
+        values = array.array("d")
+        values.frombytes(mm[start:start + 8 * count])
+        words = mm[start + 8 * count:start + 8 * count + blob_len].decode("utf-8").split("\n")
+    if len(words) != count:
+        raise ValueError(f"{path} is truncated or corrupt")
+    return dict(zip(words, values))
+
+
+def is_current(source=SOURCE, target=COMPILED):
+    """True if `target` exists and was compiled from the current `source`."""
+    try:
+        with open(target, "rb") as fh:
+            magic, _, _, crc, size = _HEADER.unpack(fh.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == MAGIC and (crc, size) == source_stamp(source)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else COMPILED
+    print(f"Wrote {compile_lexicon(target=target)} entries to {target}")
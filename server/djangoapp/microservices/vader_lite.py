@@ -0,0 +1,293 @@
+"""
+Lightweight VADER scorer that runs on the compiled lexicon.
+
+LiteAnalyzer.polarity_scores() follows nltk.sentiment.vader step for
+step and returns identical scores, but needs only the standard library:
+no NLTK import and no parsing of the lexicon text at start-up.
+bench_startup.py checks the scores against NLTK's.
+"""
+import math
+import string
+
+import lexicon_build
+
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+
+NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+}
+
+BOOSTER_DICT = {
+    **dict.fromkeys((
+        "absolutely", "amazingly", "awfully", "completely", "considerably",
+        "decidedly", "deeply", "effing", "enormously", "entirely", "especially",
+        "exceptionally", "extremely", "fabulously", "flipping", "flippin",
+        "fricking", "frickin", "frigging", "friggin", "fully", "fucking",
+        "greatly", "hella", "highly", "hugely", "incredibly", "intensely",
+        "majorly", "more", "most", "particularly", "purely", "quite", "really",
+        "remarkably", "so", "substantially", "thoroughly", "totally",
+        "tremendously", "uber", "unbelievably", "unusually", "utterly", "very",
+    ), B_INCR),
+    **dict.fromkeys((
+        "almost", "barely", "hardly", "just enough", "kind of", "kinda", "kindof",
+        "kind-of", "less", "little", "marginally", "occasionally", "partly",
+        "scarcely", "slightly", "somewhat", "sort of", "sorta", "sortof", "sort-of",
+    ), B_DECR),
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3,
+    "the bomb": 3,
+    "bad ass": 1.5,
+    "yeah right": -2,
+    "cut the mustard": 2,
+    "kiss of death": -1.5,
+    "hand to mouth": -2,
+}
+
+PUNC_LIST = {
+    ".", "!", "?", ",", ";", ":", "-", "'", '"',
+    "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?",
+}
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+
+def _negated(word):
+    word = word.lower()
+    return word in NEGATE or "n't" in word
+
+
+def _scalar_inc_dec(word, valence, is_cap_diff):
+    scalar = 0.0
+    word_lower = word.lower()
+    if word_lower in BOOSTER_DICT:
+        scalar = BOOSTER_DICT[word_lower]
+        if valence < 0:
+            scalar *= -1
+        if word.isupper() and is_cap_diff:
+            if valence > 0:
+                scalar += C_INCR
+            else:
+                scalar -= C_INCR
+    return scalar
+
+
+def words_and_emoticons(text):
+    """Tokens with leading/trailing punctuation removed (NLTK's SentiText)."""
+    words_only = {w for w in text.translate(_STRIP_PUNCTUATION).split() if len(w) > 1}
+    tokens = [we for we in text.split() if len(we) > 1]
+    for i, we in enumerate(tokens):
+        # NLTK maps word+punc and punc+word (word from words_only, punc from
+        # PUNC_LIST) back to the word; word+punc wins if both could apply.
+        word = we.rstrip(string.punctuation)
+        if word != we and we[len(word):] in PUNC_LIST and word in words_only:
+            tokens[i] = word
+            continue
+        word = we.lstrip(string.punctuation)
+        if word != we and we[:len(we) - len(word)] in PUNC_LIST and word in words_only:
+            tokens[i] = word
+    return tokens
+
+
+def _allcap_differential(words):
+    allcap_words = sum(1 for word in words if word.isupper())
+    return 0 < len(words) - allcap_words < len(words)
+
+
+class LiteAnalyzer:
+    """Drop-in for SentimentIntensityAnalyzer.polarity_scores()."""
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+
+    def polarity_scores(self, text):
+        if not isinstance(text, str):
+            text = str(text.encode("utf-8"))
+        words = words_and_emoticons(text)
+        is_cap_diff = _allcap_differential(words)
+        first_index = {}
+        for idx, token in enumerate(words):
+            first_index.setdefault(token, idx)
+
+        sentiments = []
+        for item in words:
+            i = first_index[item]
+            item_lower = item.lower()
+            if (
+                i < len(words) - 1 and item_lower == "kind" and words[i + 1].lower() == "of"
+            ) or item_lower in BOOSTER_DICT:
+                sentiments.append(0)
+                continue
+            sentiments.append(self._valence(words, item, item_lower, i, is_cap_diff))
+
+        sentiments = _but_check(words, sentiments)
+        return _score_valence(sentiments, text)
+
+    def _valence(self, words, item, item_lower, i, is_cap_diff):
+        lexicon = self.lexicon
+        if item_lower not in lexicon:
+            return 0
+        valence = lexicon[item_lower]
+        if item.isupper() and is_cap_diff:
+            if valence > 0:
+                valence += C_INCR
+            else:
+                valence -= C_INCR
+
+        for start_i in range(0, 3):
+            if i > start_i and words[i - (start_i + 1)].lower() not in lexicon:
+                s = _scalar_inc_dec(words[i - (start_i + 1)], valence, is_cap_diff)
+                if start_i == 1 and s != 0:
+                    s = s * 0.95
+                if start_i == 2 and s != 0:
+                    s = s * 0.9
+                valence = valence + s
+                valence = _never_check(valence, words, start_i, i)
+                if start_i == 2:
+                    valence = _idioms_check(valence, words, i)
+
+        # negation with "least"
+        if i > 1 and words[i - 1].lower() not in lexicon and words[i - 1].lower() == "least":
+            if words[i - 2].lower() != "at" and words[i - 2].lower() != "very":
+                valence = valence * N_SCALAR
+        elif i > 0 and words[i - 1].lower() not in lexicon and words[i - 1].lower() == "least":
+            valence = valence * N_SCALAR
+        return valence
+
+
+def _but_check(words, sentiments):
+    lowered = [w.lower() for w in words]
+    if "but" in lowered:
+        bi = lowered.index("but")
+        for sidx, sentiment in enumerate(sentiments):
+            if sidx < bi:
+                sentiments[sidx] = sentiment * 0.5
+            elif sidx > bi:
+                sentiments[sidx] = sentiment * 1.5
+    return sentiments
+
+
+def _idioms_check(valence, words, i):
+    onezero = f"{words[i - 1]} {words[i]}"
+    twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+    twoone = f"{words[i - 2]} {words[i - 1]}"
+    threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+    threetwo = f"{words[i - 3]} {words[i - 2]}"
+    for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+        if seq in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[seq]
+            break
+    if len(words) - 1 > i:
+        zeroone = f"{words[i]} {words[i + 1]}"
+        if zeroone in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[zeroone]
+    if len(words) - 1 > i + 1:
+        zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+        if zeroonetwo in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[zeroonetwo]
+    if threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT:
+        valence = valence + B_DECR
+    return valence
+
+
+def _never_check(valence, words, start_i, i):
+    if start_i == 0:
+        if _negated(words[i - 1]):
+            valence = valence * N_SCALAR
+    if start_i == 1:
+        if words[i - 2] == "never" and (words[i - 1] == "so" or words[i - 1] == "this"):
+            valence = valence * 1.5
+        elif _negated(words[i - (start_i + 1)]):
+            valence = valence * N_SCALAR
+    if start_i == 2:
+        if (
+            words[i - 3] == "never" and (words[i - 2] == "so" or words[i - 2] == "this")
+            or (words[i - 1] == "so" or words[i - 1] == "this")
+        ):
+            valence = valence * 1.25
+        elif _negated(words[i - (start_i + 1)]):
+            valence = valence * N_SCALAR
+    return valence
+
+
+def _punctuation_emphasis(text):
+    ep_amplifier = min(text.count("!"), 4) * 0.292
+    qm_count = text.count("?")
+    qm_amplifier = 0
+    if qm_count > 1:
+        qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+    return ep_amplifier + qm_amplifier
+
+
+def _score_valence(sentiments, text):
+    if sentiments:
+        sum_s = float(sum(sentiments))
+        punct_emph_amplifier = _punctuation_emphasis(text)
+        if sum_s > 0:
+            sum_s += punct_emph_amplifier
+        elif sum_s < 0:
+            sum_s -= punct_emph_amplifier
+        compound = sum_s / math.sqrt((sum_s * sum_s) + 15)
+
+        pos_sum = 0.0
+        neg_sum = 0.0
+        neu_count = 0
+        for sentiment_score in sentiments:
+            if sentiment_score > 0:
+                pos_sum += float(sentiment_score) + 1
+            if sentiment_score < 0:
+                neg_sum += float(sentiment_score) - 1
+            if sentiment_score == 0:
+                neu_count += 1
+
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += punct_emph_amplifier
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= punct_emph_amplifier
+
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+        pos = math.fabs(pos_sum / total)
+        neg = math.fabs(neg_sum / total)
+        neu = math.fabs(neu_count / total)
+    else:
+        compound = 0.0
+        pos = 0.0
+        neg = 0.0
+        neu = 0.0
+
+    return {
+        "neg": round(neg, 3),
+        "neu": round(neu, 3),
+        "pos": round(pos, 3),
+        "compound": round(compound, 4),
+    }
+
+
+def load_analyzer(path=lexicon_build.COMPILED):
+    """
+    LiteAnalyzer over the compiled lexicon, compiling it first (straight
+    from the zip, still without NLTK) if it is missing or out of date.
+    """
+    if not lexicon_build.is_current(target=path):
+        try:
+            lexicon_build.compile_lexicon(target=path)
+        except OSError:
+            # Read-only install: parse the zip in memory instead.
+            words, values = lexicon_build.parse(lexicon_build.read_source())
+            return LiteAnalyzer(dict(zip(words, values)))
+    return LiteAnalyzer(lexicon_build.load_lexicon(path))
+
+
+if __name__ == "__main__":
+    import sys
+    print(load_analyzer().polarity_scores(" ".join(sys.argv[1:])))
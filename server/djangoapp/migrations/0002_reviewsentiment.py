@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSentiment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_id', models.IntegerField(help_text='Refers to review ID in the external database', unique=True)),
+                ('dealer_id', models.IntegerField(db_index=True)),
+                ('label', models.CharField(choices=[('positive', 'Positive'), ('neutral', 'Neutral'), ('negative', 'Negative')], max_length=10)),
+                ('compound', models.FloatField(blank=True, null=True)),
+                ('pos', models.FloatField(blank=True, null=True)),
+                ('neg', models.FloatField(blank=True, null=True)),
+                ('neu', models.FloatField(blank=True, null=True)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0004_reviewsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirroredReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_id', models.IntegerField(help_text='Refers to review ID in the external database', unique=True)),
+                ('dealer_id', models.IntegerField()),
+                ('payload', models.JSONField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dealer_id', 'review_id'], name='mirroredreview_dealer_id')],
+            },
+        ),
+    ]
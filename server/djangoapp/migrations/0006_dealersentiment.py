@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:53
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill(apps, schema_editor):
+    """Start the rollups from the sentiment already stored; from here on
+    they are only moved incrementally."""
+    ReviewSentiment = apps.get_model('djangoapp', 'ReviewSentiment')
+    DealerSentiment = apps.get_model('djangoapp', 'DealerSentiment')
+    totals = (
+        ReviewSentiment.objects.exclude(dealer_id=0)
+        .values('dealer_id')
+        .annotate(
+            positive=Count('id', filter=Q(label='positive')),
+            negative=Count('id', filter=Q(label='negative')),
+            total=Count('id'),
+            compound_sum=Sum('compound'),
+            compound_count=Count('compound'),
+        )
+    )
+    DealerSentiment.objects.bulk_create([
+        DealerSentiment(
+            dealer_id=row['dealer_id'],
+            positive=row['positive'],
+            negative=row['negative'],
+            neutral=row['total'] - row['positive'] - row['negative'],
+            compound_sum=row['compound_sum'] or 0.0,
+            compound_count=row['compound_count'],
+            mean_compound=(
+                row['compound_sum'] / row['compound_count'] if row['compound_count'] else None
+            ),
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0005_mirroredreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealerSentiment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dealer_id', models.IntegerField(unique=True)),
+                ('state', models.CharField(blank=True, max_length=64)),
+                ('positive', models.IntegerField(default=0)),
+                ('neutral', models.IntegerField(default=0)),
+                ('negative', models.IntegerField(default=0)),
+                ('compound_sum', models.FloatField(default=0.0)),
+                ('compound_count', models.IntegerField(default=0)),
+                ('mean_compound', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'mean_compound'], name='dealersentiment_state_mean'), models.Index(fields=['mean_compound'], name='dealersentiment_mean')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
 # Car Make model
 class CarMake(models.Model):
@@ -54,6 +58,153 @@ class CarModel(models.Model):
     class Meta:
         # Prevent duplicate entries for the same make/model/year
         unique_together = ('make', 'name', 'year')
+        # Back the catalog filters (make/type/dealer, each with a year range)
+        indexes = [
+            models.Index(fields=['make', 'type', 'year'], name='carmodel_make_type_year'),
+            models.Index(fields=['type', 'year'], name='carmodel_type_year'),
+            models.Index(fields=['dealer_id', 'year'], name='carmodel_dealer_year'),
+        ]
 
     def __str__(self):
         return f"{self.make.name} {self.name} ({self.year})"
+
+
+# Sentiment of an upstream review, scored once and stored locally
+class ReviewSentiment(models.Model):
+    POSITIVE = 'positive'
+    NEUTRAL = 'neutral'
+    NEGATIVE = 'negative'
+    LABEL_CHOICES = [
+        (POSITIVE, 'Positive'),
+        (NEUTRAL, 'Neutral'),
+        (NEGATIVE, 'Negative'),
+    ]
+
+    # Review Id refers to a review created in the external reviews DB
+    review_id = models.IntegerField(
+        unique=True, help_text="Refers to review ID in the external database"
+    )
+    dealer_id = models.IntegerField(db_index=True)
+    label = models.CharField(max_length=10, choices=LABEL_CHOICES)
+
+    # Raw VADER scores; empty when the service only returned a label
+    compound = models.FloatField(null=True, blank=True)
+    pos = models.FloatField(null=True, blank=True)
+    neg = models.FloatField(null=True, blank=True)
+    neu = models.FloatField(null=True, blank=True)
+
+    scored_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Review {self.review_id}: {self.label}"
+
+
+# Review accepted locally and waiting to be delivered to the reviews backend
+class ReviewSubmission(models.Model):
+    PENDING = 'pending'
+    SENDING = 'sending'
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (DELIVERED, 'Delivered'),
+        (FAILED, 'Failed'),
+    ]
+
+    tracking_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+
+    # Delivery bookkeeping: a pending row is due once next_attempt_at has
+    # passed; a sending row whose lease (next_attempt_at) ran out is
+    # picked up again.
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    # Review Id the backend assigned on delivery
+    review_id = models.IntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='reviewsub_status_due'),
+        ]
+
+    def __str__(self):
+        return f"Submission {self.tracking_id}: {self.status}"
+
+
+# Local copy of an upstream review, kept current by review_mirror.sync()
+class MirroredReview(models.Model):
+    # Review Id refers to a review created in the external reviews DB;
+    # ids only grow, so the highest one stored is the sync cursor.
+    review_id = models.IntegerField(
+        unique=True, help_text="Refers to review ID in the external database"
+    )
+    dealer_id = models.IntegerField()
+    # The review document as the backend returned it
+    payload = models.JSONField()
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Backs the per-dealer pages: dealer_id = ? AND review_id > ? ORDER BY review_id
+        indexes = [
+            models.Index(fields=['dealer_id', 'review_id'], name='mirroredreview_dealer_id'),
+        ]
+
+    def __str__(self):
+        return f"Review {self.review_id} (dealer {self.dealer_id})"
+
+
+# Sentiment totals of a dealer's reviews, moved by sentiment_rollup.apply()
+# whenever a ReviewSentiment row is written, never recomputed
+class DealerSentiment(models.Model):
+    dealer_id = models.IntegerField(unique=True)
+    # Lower-cased state name from the dealer directory, for leaderboards
+    state = models.CharField(max_length=64, blank=True)
+
+    positive = models.IntegerField(default=0)
+    neutral = models.IntegerField(default=0)
+    negative = models.IntegerField(default=0)
+
+    # Mean VADER compound score over the reviews that have one
+    compound_sum = models.FloatField(default=0.0)
+    compound_count = models.IntegerField(default=0)
+    mean_compound = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Back the leaderboards: ORDER BY mean_compound DESC, per state or overall
+        indexes = [
+            models.Index(fields=['state', 'mean_compound'], name='dealersentiment_state_mean'),
+            models.Index(fields=['mean_compound'], name='dealersentiment_mean'),
+        ]
+
+    @property
+    def reviews(self):
+        return self.positive + self.neutral + self.negative
+
+    def __str__(self):
+        return f"Dealer {self.dealer_id}: {self.reviews} reviews"
+
+
+# Version token of a set of local tables, changed in the transaction that
+# changes them; shared by every process through the database
+class DataVersion(models.Model):
+    CARS = 'cars'
+
+    name = models.CharField(max_length=32, unique=True)
+    token = models.CharField(max_length=32, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.token}"
@@ -1,5 +1,107 @@
+import time
+
+from django.db import transaction
+
+from .conditional import bump_cars_version
 from .models import CarMake, CarModel
 
+# bodyType values in car_records.json that are not CarModel type choices
+BODY_TYPE_ALIASES = {
+    "pickup": CarModel.TRUCK,
+    "minivan": CarModel.WAGON,
+    "convertible": CarModel.COUPE,
+}
+_TYPE_BY_NAME = {value.lower(): value for value, _ in CarModel.TYPE_CHOICES}
+
+
+def car_type(body_type):
+    """Map a car record's bodyType onto a CarModel type choice."""
+    key = (body_type or "").lower()
+    return _TYPE_BY_NAME.get(key) or BODY_TYPE_ALIASES.get(key) or CarModel.SEDAN
+
+
+def _chunked(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_car_records(records, batch_size=1000, update=False, progress=None):
+    """
+    Load car records shaped like database/data/car_records.json entries
+    ({"make", "model", "bodyType", "year", "dealer_id", ...}) into
+    CarMake/CarModel with one transaction per batch.
+
+    Makes are matched case-insensitively and created as needed. Models
+    that already exist for the same (make, name, year) are skipped, or
+    with update=True have their type and dealer_id overwritten.
+    `records` may be any iterable, e.g. a jsonstream iterator, so the
+    input never has to fit in memory. Returns counters including rows/sec.
+    """
+    make_ids = {name.lower(): pk for pk, name in CarMake.objects.values_list("id", "name")}
+    models_before = CarModel.objects.count()
+    seen = sent = 0
+    started = time.perf_counter()
+
+    for batch in _chunked(records, max(1, batch_size)):
+        with transaction.atomic():
+            new_makes = {}
+            for record in batch:
+                name = record["make"]
+                if name.lower() not in make_ids:
+                    new_makes.setdefault(name.lower(), name)
+            if new_makes:
+                CarMake.objects.bulk_create(
+                    [CarMake(name=name) for name in new_makes.values()],
+                    ignore_conflicts=True,
+                )
+                make_ids.update(
+                    (name.lower(), pk) for pk, name in
+                    CarMake.objects.filter(name__in=new_makes.values()).values_list("id", "name")
+                )
+
+            # One row per (make, name, year) per batch; later records win.
+            models = {}
+            for record in batch:
+                make_id = make_ids[record["make"].lower()]
+                models[(make_id, record["model"], int(record["year"]))] = CarModel(
+                    make_id=make_id,
+                    name=record["model"],
+                    year=int(record["year"]),
+                    type=car_type(record.get("bodyType")),
+                    dealer_id=int(record.get("dealer_id") or 0),
+                )
+            if update:
+                CarModel.objects.bulk_create(
+                    models.values(),
+                    update_conflicts=True,
+                    unique_fields=["make", "name", "year"],
+                    update_fields=["type", "dealer_id"],
+                )
+            else:
+                CarModel.objects.bulk_create(models.values(), ignore_conflicts=True)
+
+        seen += len(batch)
+        sent += len(models)
+        if progress:
+            progress(seen)
+
+    # bulk_create sends no post_save, so car ETags are invalidated here.
+    bump_cars_version()
+    elapsed = time.perf_counter() - started
+    return {
+        "records": seen,
+        "rows_sent": sent,
+        "models_created": CarModel.objects.count() - models_before,
+        "seconds": elapsed,
+        "rows_per_sec": seen / elapsed if elapsed else 0.0,
+    }
+
 
 def initiate():
     # Create car makes
@@ -10,43 +112,33 @@ def initiate():
         {"name": "Kia", "description": "Great cars. Korean technology"},
         {"name": "Toyota", "description": "Great cars. Japanese technology"},
     ]
-    car_make_instances = []
-    for data in car_make_data:
-        car_make_instances.append(
-            CarMake.objects.create(
-                name=data['name'],
-                description=data['description']
-            )
-        )
-
-    # Create car models (our FK field is named 'make')
+    CarMake.objects.bulk_create(
+        [CarMake(name=data['name'], description=data['description']) for data in car_make_data],
+        ignore_conflicts=True,
+    )
+
+    # Create car models through the same bulk path as the importer
     car_model_data = [
-        {"name": "Pathfinder", "type": "SUV", "year": 2023, "make": car_make_instances[0]},
-        {"name": "Qashqai", "type": "SUV", "year": 2023, "make": car_make_instances[0]},
-        {"name": "XTRAIL", "type": "SUV", "year": 2023, "make": car_make_instances[0]},
+        {"model": "Pathfinder", "bodyType": "SUV", "year": 2023, "make": "NISSAN"},
+        {"model": "Qashqai", "bodyType": "SUV", "year": 2023, "make": "NISSAN"},
+        {"model": "XTRAIL", "bodyType": "SUV", "year": 2023, "make": "NISSAN"},
 
-        {"name": "A-Class", "type": "SUV", "year": 2023, "make": car_make_instances[1]},
-        {"name": "C-Class", "type": "SUV", "year": 2023, "make": car_make_instances[1]},
-        {"name": "E-Class", "type": "SUV", "year": 2023, "make": car_make_instances[1]},
+        {"model": "A-Class", "bodyType": "SUV", "year": 2023, "make": "Mercedes"},
+        {"model": "C-Class", "bodyType": "SUV", "year": 2023, "make": "Mercedes"},
+        {"model": "E-Class", "bodyType": "SUV", "year": 2023, "make": "Mercedes"},
 
-        {"name": "A4", "type": "SUV", "year": 2023, "make": car_make_instances[2]},
-        {"name": "A5", "type": "SUV", "year": 2023, "make": car_make_instances[2]},
-        {"name": "A6", "type": "SUV", "year": 2023, "make": car_make_instances[2]},
+        {"model": "A4", "bodyType": "SUV", "year": 2023, "make": "Audi"},
+        {"model": "A5", "bodyType": "SUV", "year": 2023, "make": "Audi"},
+        {"model": "A6", "bodyType": "SUV", "year": 2023, "make": "Audi"},
 
-        {"name": "Sorrento", "type": "SUV", "year": 2023, "make": car_make_instances[3]},
-        {"name": "Carnival", "type": "SUV", "year": 2023, "make": car_make_instances[3]},
-        {"name": "Cerato", "type": "Sedan", "year": 2023, "make": car_make_instances[3]},
+        {"model": "Sorrento", "bodyType": "SUV", "year": 2023, "make": "Kia"},
+        {"model": "Carnival", "bodyType": "SUV", "year": 2023, "make": "Kia"},
+        {"model": "Cerato", "bodyType": "Sedan", "year": 2023, "make": "Kia"},
 
-        {"name": "Corolla", "type": "Sedan", "year": 2023, "make": car_make_instances[4]},
-        {"name": "Camry", "type": "Sedan", "year": 2023, "make": car_make_instances[4]},
-        {"name": "Kluger", "type": "SUV", "year": 2023, "make": car_make_instances[4]},
+        {"model": "Corolla", "bodyType": "Sedan", "year": 2023, "make": "Toyota"},
+        {"model": "Camry", "bodyType": "Sedan", "year": 2023, "make": "Toyota"},
+        {"model": "Kluger", "bodyType": "SUV", "year": 2023, "make": "Toyota"},
     ]
 
-    for data in car_model_data:
-        CarModel.objects.create(
-            name=data['name'],
-            type=data['type'],
-            year=data['year'],
-            make=data['make'],
-            dealer_id=0,  # default; can edit later in admin if needed
-        )
+    # dealer_id defaults to 0; can edit later in admin if needed
+    import_car_records(car_model_data)
@@ -0,0 +1,109 @@
+"""
+Process-wide data loaded on first use and refreshed in the background.
+
+The dealer directory, the inventory index and the review mirror all keep
+something built from an upstream source: read it without waiting once it
+exists, rebuild it when it is older than max_age (or marked stale), and
+never run two rebuilds at once. Refreshable is that pattern once:
+
+- get() returns the current value. The first call loads it inline
+  (block=True) or starts a background load and returns None; later calls
+  return at once and start a background refresh when the value is stale.
+- refresh() loads now, waiting for any load already running.
+- A failed load (None or an exception) keeps the current value.
+- refresh_in_background(rerun=True) while a refresh is running queues
+  one more, so a change made during that refresh is picked up.
+
+Background loads run in a daemon thread that closes its database
+connections when done.
+"""
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class Refreshable:
+    def __init__(self, name, load, max_age):
+        """
+        load(*args, **kwargs) returns the new value, or None if the source
+        could not be reached; max_age is in seconds.
+        """
+        self.name = name
+        self.max_age = max_age
+        self._load = load
+        self._lock = threading.Lock()  # one load at a time
+        self._flag_lock = threading.Lock()
+        self.value = None
+        self.loaded_at = None
+        self.refreshing = False
+        self._rerun = False
+        self._stale = False
+
+    def _refresh_locked(self, *args, **kwargs):
+        value = self._load(*args, **kwargs)
+        if value is not None:
+            self.value = value
+            self.loaded_at = time.time()
+            self._stale = False
+        return value
+
+    def refresh(self, *args, **kwargs):
+        """Load now; the new value, or None if the load failed."""
+        with self._lock:
+            return self._refresh_locked(*args, **kwargs)
+
+    def get(self, block=True, **kwargs):
+        """
+        The current value, refreshed in the background when stale. If none
+        is loaded yet it is loaded inline (block=True, passing kwargs to
+        load) or in the background (block=False, returning None meanwhile).
+        """
+        value = self.value
+        if value is None and block:
+            with self._lock:
+                return self.value if self.value is not None else self._refresh_locked(**kwargs)
+        if value is None or self._stale or time.time() - self.loaded_at > self.max_age:
+            self.refresh_in_background()
+        return value
+
+    def is_fresh(self):
+        loaded_at = self.loaded_at
+        return (loaded_at is not None and not self._stale
+                and time.time() - loaded_at <= self.max_age)
+
+    def invalidate(self):
+        """Mark the value stale so the next get() triggers a refresh."""
+        self._stale = True
+
+    def refresh_in_background(self, rerun=False):
+        """
+        Start a background refresh unless one is running; with rerun,
+        queue another to run after it instead of dropping the request.
+        """
+        with self._flag_lock:
+            if self.refreshing:
+                self._rerun = self._rerun or rerun
+                return
+            self.refreshing = True
+        threading.Thread(target=self._background, name=f"{self.name}-refresh",
+                         daemon=True).start()
+
+    def _background(self):
+        try:
+            while True:
+                try:
+                    if self.refresh() is None:
+                        logger.warning("%s refresh failed; keeping the current one", self.name)
+                except Exception:
+                    logger.exception("%s refresh failed; keeping the current one", self.name)
+                with self._flag_lock:
+                    if not self._rerun:
+                        self.refreshing = False
+                        return
+                    self._rerun = False
+        finally:
+            connections.close_all()
@@ -0,0 +1,277 @@
+"""
+Failure isolation for upstream calls, one set per upstream host:
+
+- Bulkhead: caps concurrent calls, so a slow upstream can hold at most
+  that many worker threads; callers over the cap are turned away. Async
+  callers hold no thread while they wait and get a separate, larger cap.
+- AdaptiveTimeout: read timeout derived from recently observed latencies
+  (a multiple of their p99), between a floor and the configured maximum.
+  Learned per route (method and path), and only for idempotent methods:
+  a POST that times out may still have been applied upstream, so POSTs
+  keep the configured maximum.
+- CircuitBreaker: after consecutive failures the upstream is skipped for
+  a cool-down, then one probe call decides whether it is back.
+
+A call turned away raises UpstreamUnavailable at once, which the
+restapis helpers treat like any failed call (they return None) and the
+views answer from whatever degraded data they have.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+# Concurrent calls per upstream host, and how long a call may wait for a
+# free slot before it is rejected.
+max_concurrent = int(os.getenv('upstream_max_concurrent', default="16"))
+async_max_concurrent = int(os.getenv('upstream_async_max_concurrent', default="256"))
+bulkhead_wait = float(os.getenv('upstream_bulkhead_wait', default="0.05"))
+# Read timeout: upstream_timeout_factor x the p99 of the last
+# upstream_timeout_window successful calls, clamped to
+# [upstream_min_read_timeout, upstream_read_timeout].
+timeout_factor = float(os.getenv('upstream_timeout_factor', default="3"))
+timeout_window = int(os.getenv('upstream_timeout_window', default="200"))
+timeout_min_samples = int(os.getenv('upstream_timeout_min_samples', default="20"))
+min_read_timeout = float(os.getenv('upstream_min_read_timeout', default="0.5"))
+# Open the circuit after this many consecutive failures, for this long.
+failure_threshold = int(os.getenv('upstream_failure_threshold', default="5"))
+reset_seconds = float(os.getenv('upstream_reset_seconds', default="30"))
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not attempted: bulkhead full or circuit open."""
+
+
+class Bulkhead:
+    def __init__(self, limit=max_concurrent, wait=bulkhead_wait):
+        self.limit = limit
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.rejected = 0
+
+    def acquire(self, blocking=True):
+        """Take a slot (waiting up to `wait` if blocking); False if none."""
+        if self._slots.acquire(timeout=self.wait) if blocking else self._slots.acquire(False):
+            with self._lock:
+                self.in_use += 1
+            return True
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def stats(self):
+        return {"limit": self.limit, "in_use": self.in_use, "rejected": self.rejected}
+
+
+# Methods safe to cut short and retry; only their timeouts adapt.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdaptiveTimeout:
+    def __init__(self, maximum, minimum=min_read_timeout, factor=timeout_factor,
+                 window=timeout_window, min_samples=timeout_min_samples, adaptive=True):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.factor = factor
+        self.min_samples = min_samples
+        self.adaptive = adaptive
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._current = maximum
+
+    def observe(self, seconds):
+        """Record the latency of a successful call and recompute the timeout."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self._samples.append(seconds)
+            if len(self._samples) < self.min_samples:
+                return
+            ordered = sorted(self._samples)
+            p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+            self._current = max(self.minimum, min(self.maximum, p99 * self.factor))
+
+    def expired(self):
+        """
+        A call timed out: double the timeout (up to the maximum) and learn
+        again from fresh samples, so a slower upstream is not cut off forever.
+        """
+        with self._lock:
+            self._samples.clear()
+            self._current = min(self.maximum, self._current * 2)
+
+    def current(self):
+        return self._current
+
+    def stats(self):
+        return {
+            "read_timeout": round(self._current, 3),
+            "adaptive": self.adaptive,
+            "samples": len(self._samples),
+            "max": self.maximum,
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=failure_threshold, reset_after=reset_seconds):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.opened = 0
+        self.short_circuited = 0
+        self._probing = False
+
+    def allow(self):
+        """
+        Whether a call may go ahead. Once an open circuit's cool-down is
+        over, exactly one call is let through as the half-open probe.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (self.state == self.OPEN
+                    and time.monotonic() - self.opened_at >= self.reset_after):
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def abandon(self):
+        """A call that ended without an outcome (cancelled): if it was the
+        half-open probe, let the next call probe instead."""
+        with self._lock:
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_after - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.opened,
+                "short_circuited": self.short_circuited,
+                "retry_in_seconds": None if retry_in is None else round(retry_in, 1),
+            }
+
+
+def is_upstream_failure(err):
+    """
+    Errors that count against the circuit: no response (connection errors,
+    timeouts) or a 5xx. A 4xx means the upstream is up and answering.
+    """
+    response = getattr(err, "response", None)
+    if response is not None:
+        return response.status_code >= 500
+    if isinstance(err, requests.RequestException):
+        return True
+    # httpx errors (the async client) carry no requests base class.
+    return type(err).__module__.startswith("httpx")
+
+
+def is_timeout(err):
+    return isinstance(err, requests.Timeout) or "Timeout" in type(err).__name__
+
+
+class Guard:
+    """
+    Bulkheads (sync and async callers), per-route adaptive timeouts and the
+    circuit breaker of one upstream. Routes are "METHOD /path" strings with
+    ids collapsed (instrumentation.upstream_route).
+    """
+
+    def __init__(self, read_timeout, async_limit=async_max_concurrent):
+        self.read_timeout = read_timeout
+        self.bulkhead = Bulkhead()
+        # Async callers never wait for a slot (that would block the loop).
+        self.async_bulkhead = Bulkhead(limit=async_limit, wait=0)
+        self.breaker = CircuitBreaker()
+        self._timeouts = {}
+        self._timeouts_lock = threading.Lock()
+
+    def timeout(self, route):
+        """The AdaptiveTimeout of a route, created on first use."""
+        timeout = self._timeouts.get(route)
+        if timeout is None:
+            with self._timeouts_lock:
+                timeout = self._timeouts.get(route)
+                if timeout is None:
+                    method = route.partition(" ")[0]
+                    timeout = self._timeouts[route] = AdaptiveTimeout(
+                        self.read_timeout, adaptive=method in IDEMPOTENT_METHODS
+                    )
+        return timeout
+
+    def _bulkhead(self, asynchronous):
+        return self.async_bulkhead if asynchronous else self.bulkhead
+
+    def enter(self, asynchronous=False):
+        """Admit a call or raise UpstreamUnavailable; pair with exit()."""
+        bulkhead = self._bulkhead(asynchronous)
+        if not bulkhead.acquire(blocking=not asynchronous):
+            raise UpstreamUnavailable("bulkhead full")
+        if not self.breaker.allow():
+            bulkhead.release()
+            raise UpstreamUnavailable("circuit open")
+
+    def exit(self, route, elapsed, error=None, asynchronous=False):
+        self._bulkhead(asynchronous).release()
+        if error is not None and is_upstream_failure(error):
+            self.breaker.failure()
+            if is_timeout(error):
+                self.timeout(route).expired()
+            return
+        self.breaker.success()
+        if error is None:
+            self.timeout(route).observe(elapsed)
+
+    def cancel(self, asynchronous=False):
+        """exit() for a call cancelled before it finished (client gone,
+        caller's timeout): frees its slot, records no outcome or latency."""
+        self._bulkhead(asynchronous).release()
+        self.breaker.abandon()
+
+    def stats(self):
+        with self._timeouts_lock:
+            timeouts = dict(self._timeouts)
+        return {
+            "circuit": self.breaker.stats(),
+            "bulkhead": self.bulkhead.stats(),
+            "async_bulkhead": self.async_bulkhead.stats(),
+            "timeouts": {route: t.stats() for route, t in sorted(timeouts.items())},
+        }
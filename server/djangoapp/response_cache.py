@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-process cache for upstream responses with stale-while-revalidate.
+
+    get(key, loader) returns the cached value while it is fresh (`ttl`).
+    For `stale_ttl` seconds after that the stale value is still returned
+    immediately, while one background thread per key calls `loader` to
+    refresh it. Older entries are reloaded synchronously; if that load
+    fails (loader returns None) the old value is served anyway and kept
+    as stale, so an upstream outage degrades to stale data rather than to
+    nothing, and only background refreshes keep probing the upstream.
+    """
+
+    def __init__(self, name, ttl=300, stale_ttl=3600, max_entries=1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.served_on_error = 0
+
+    def _store(self, key, value, ttl, stored_at=None):
+        with self._lock:
+            if stored_at is None:
+                stored_at = time.monotonic()
+            self._entries[key] = (stored_at, ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key, loader, ttl):
+        try:
+            value = loader()
+        except Exception as err:
+            logger.warning("%s cache: loading %s failed: %s", self.name, key, err)
+            value = None
+        if value is not None:
+            self._store(key, value, ttl)
+        return value
+
+    def _refresh(self, key, loader, ttl):
+        try:
+            if self._load(key, loader, ttl) is None:
+                with self._lock:
+                    self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _lookup(self, key, loader, ttl):
+        """
+        Returns (True, value) when the cached value can be served as is,
+        starting a background refresh if it is stale; otherwise (False,
+        previous entry or None) and the caller must load inline.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, entry_ttl, value = entry
+                age = now - stored_at
+                if age < entry_ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return True, value
+                if age < entry_ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self.refreshes += 1
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader, ttl),
+                            name=f"{self.name}-refresh", daemon=True,
+                        ).start()
+                    return True, value
+            self.misses += 1
+            return False, entry
+
+    def _fallback(self, key, fresh, entry, ttl):
+        if fresh is None and entry is not None:
+            with self._lock:
+                self.served_on_error += 1
+            self._store(key, entry[2], ttl, stored_at=time.monotonic() - ttl)
+            return entry[2]
+        return fresh
+
+    def get(self, key, loader, ttl=None):
+        """
+        Cached value for `key`, calling `loader()` to (re)fill it.
+        `ttl` overrides the cache-wide freshness lifetime for this key.
+        Returns None only if nothing is cached and the loader fails.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        served, found = self._lookup(key, loader, ttl)
+        if served:
+            return found
+        return self._fallback(key, self._load(key, loader, ttl), found, ttl)
+
+    async def aget(self, key, aloader, loader, ttl=None):
+        """
+        Async get(): inline loads await `aloader()`. Background refreshes
+        still run the sync `loader` in a thread, since they must outlive
+        the request's event loop.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        served, found = self._lookup(key, loader, ttl)
+        if served:
+            return found
+        try:
+            fresh = await aloader()
+        except Exception as err:
+            logger.warning("%s cache: loading %s failed: %s", self.name, key, err)
+            fresh = None
+        if fresh is not None:
+            self._store(key, fresh, ttl)
+        return self._fallback(key, fresh, found, ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "served_on_error": self.served_on_error,
+            }
+
+
+# Dealer directory responses (/fetchDealers, /fetchDealers/<state>,
+# /fetchDealer/<id>): they change rarely and are the hottest reads.
+dealer_cache = StaleWhileRevalidateCache(
+    "dealers",
+    ttl=int(os.getenv('dealer_cache_ttl', default="300")),
+    stale_ttl=int(os.getenv('dealer_cache_stale_ttl', default="3600")),
+)
+
+
+def dealers_key(state="All"):
+    # The backend matches states case-insensitively, so the key does too.
+    return "dealers:" + state.lower()
+
+
+def dealer_key(dealer_id):
+    return f"dealer:{dealer_id}"
+
+
+def invalidate_dealers(dealer_id=None):
+    """
+    Invalidation hook for dealer data. Drops one dealer plus every list it
+    may appear in, or the whole dealer cache when dealer_id is None.
+    """
+    if dealer_id is None:
+        dealer_cache.clear()
+        return
+    dealer_cache.invalidate(dealer_key(dealer_id))
+    dealer_cache.invalidate_prefix("dealers:")
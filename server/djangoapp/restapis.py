@@ -1,73 +1,348 @@
+import asyncio
+import logging
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
 from dotenv import load_dotenv
 from urllib.parse import quote
+import requests
+
+from .instrumentation import bind
+from .jsonstream import iter_json_array
+from .sentiment_cache import SentimentCache, text_key
+from .singleflight import SingleFlight
+from .resilience import UpstreamUnavailable
+from .upstream import get_async_client, get_client
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 backend_url = os.getenv('backend_url', default="http://localhost:3030")
 sentiment_analyzer_url = os.getenv('sentiment_analyzer_url', default="http://localhost:5050/")
 
+# Upper bound on concurrent calls to the sentiment service per dealer page.
+sentiment_max_workers = int(os.getenv('sentiment_max_workers', default="8"))
+
+# Texts per /analyze_batch request; larger inputs are split into chunks.
+sentiment_batch_size = int(os.getenv('sentiment_batch_size', default="100"))
+
+# Results are cached by review text; set sentiment_cache_alias to "" to keep
+# the cache in-process only instead of also persisting it via Django's cache.
+sentiment_cache = SentimentCache(
+    max_entries=int(os.getenv('sentiment_cache_size', default="10000")),
+    ttl=int(os.getenv('sentiment_cache_ttl', default="86400")),
+    backend_alias=os.getenv('sentiment_cache_alias', default="sentiment"),
+)
+
+# Concurrent identical GETs (same URL and params) share one upstream call.
+inflight = SingleFlight()
+
+# Bytes read from the socket at a time by stream_request().
+stream_chunk_size = int(os.getenv('upstream_stream_chunk_size', default="65536"))
+
+
+def _log_failure(what, request_url, err):
+    # Calls turned away by a bulkhead or open circuit fail fast and in
+    # bulk; the circuit's state is on the upstreams endpoint instead.
+    if isinstance(err, UpstreamUnavailable):
+        logger.debug("%s %s skipped: %s", what, request_url, err)
+    else:
+        logger.warning("%s %s failed: %s", what, request_url, err)
+
+
+def _get_key(request_url, params=None):
+    return (request_url, tuple(sorted((params or {}).items())))
+
 
 def get_request(endpoint, **kwargs):
     """
     Generic GET request helper.
     endpoint: string (e.g. '/fetchDealers')
     kwargs: query parameters (e.g. dealerId="15")
+    Concurrent identical calls are coalesced, so the returned object may be
+    shared with other callers and must not be mutated.
     """
-    params = ""
-    if kwargs:
-        pairs = []
-        for k, v in kwargs.items():
-            pairs.append(f"{k}={v}")
-        params = "&".join(pairs)
-
     if not endpoint.startswith("/"):
         endpoint = "/" + endpoint
 
     request_url = backend_url + endpoint
-    if params:
-        request_url = request_url + "?" + params
+    params = kwargs or None
 
-    print(f"GET from {request_url}")
+    logger.debug("GET %s params=%s", request_url, params)
     try:
-        response = requests.get(request_url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return inflight.do(
+            _get_key(request_url, params),
+            lambda: get_client(request_url).get(request_url, params=params).json(),
+        )
     except Exception as err:
-        print(f"Network exception occurred: {err}")
+        _log_failure("GET", request_url, err)
         return None
 
 
+def stream_request(endpoint, key=None, **kwargs):
+    """
+    get_request() for large JSON arrays: yields the elements as they are
+    parsed off the response body, so the list is never held whole (key as
+    for iter_json_array). Not coalesced and not cached. Failures are
+    logged and raised: before the first element the caller can still fall
+    back; later the caller's output is already partly sent.
+    """
+    if not endpoint.startswith("/"):
+        endpoint = "/" + endpoint
+
+    request_url = backend_url + endpoint
+    params = kwargs or None
+
+    logger.debug("GET %s params=%s (streamed)", request_url, params)
+    try:
+        with get_client(request_url).stream("GET", request_url, params=params) as response:
+            yield from iter_json_array(response.iter_content(stream_chunk_size), key)
+    except Exception as err:
+        _log_failure("GET", request_url, err)
+        raise
+
+
 def analyze_review_sentiments(text: str):
     """
     Calls the Code Engine sentiment microservice at:
     <sentiment_analyzer_url>/analyze/<text>
+    Results are served from sentiment_cache when the text was seen before.
     """
+    cached = sentiment_cache.get(text)
+    if cached is not None:
+        return cached
     request_url = sentiment_analyzer_url + "analyze/" + quote(text, safe="")
-    print(f"Sentiment GET from {request_url}")
+    logger.debug("Sentiment GET %s", request_url)
     try:
-        response = requests.get(request_url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        result = inflight.do(
+            _get_key(request_url), lambda: get_client(request_url).get(request_url).json()
+        )
+        sentiment_cache.set(text, result)
+        return result
     except Exception as err:
-        print(f"Unexpected error in analyze_review_sentiments: {err}")
+        _log_failure("Sentiment GET", request_url, err)
         return None
 
 
+def analyze_review_sentiments_many(texts, max_workers=None):
+    """
+    Scores several review texts concurrently.
+    At most max_workers (default: sentiment_max_workers) calls are in flight.
+    Returns one result per text, in input order; failed calls yield None.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    workers = max(1, min(max_workers or sentiment_max_workers, len(texts)))
+    if workers == 1:
+        return [analyze_review_sentiments(t) for t in texts]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(bind(analyze_review_sentiments), texts))
+
+
+def _analyze_batch_chunk(texts):
+    request_url = sentiment_analyzer_url.rstrip("/") + "/analyze_batch"
+    logger.debug("Sentiment POST %s with %s texts", request_url, len(texts))
+    try:
+        response = get_client(request_url).post(request_url, json=texts)
+        results = response.json().get("results") or []
+        if len(results) != len(texts):
+            raise ValueError(f"expected {len(texts)} results, got {len(results)}")
+        return results
+    except Exception as err:
+        _log_failure("Sentiment POST", request_url, err)
+        return [None] * len(texts)
+
+
+def _plan_batch(texts, chunk_size):
+    """
+    Split a batch into cached results and chunks of distinct uncached texts.
+    Returns (results, pending, chunks) where pending maps each uncached
+    text's key to (text, [indexes into results]).
+    """
+    results = sentiment_cache.get_many(texts)
+    pending = {}
+    for i, (text, result) in enumerate(zip(texts, results)):
+        if result is None:
+            pending.setdefault(text_key(text), (text, []))[1].append(i)
+    unique = [text for text, _ in pending.values()]
+    size = max(1, chunk_size or sentiment_batch_size)
+    chunks = [unique[i:i + size] for i in range(0, len(unique), size)]
+    return results, pending, chunks
+
+
+def _merge_batch(results, pending, scored):
+    """Fill results from freshly scored texts and cache them."""
+    fresh = []
+    for (text, indexes), result in zip(pending.values(), scored):
+        if result is None:
+            continue
+        result = {k: v for k, v in result.items() if k != "id"}
+        fresh.append((text, result))
+        for i in indexes:
+            results[i] = result
+    sentiment_cache.set_many(fresh)
+    return results
+
+
+def analyze_review_sentiments_batch(texts, chunk_size=None):
+    """
+    Scores texts through the sentiment service's /analyze_batch endpoint.
+    Cached texts are answered from sentiment_cache and duplicates are sent
+    once. The rest is split into chunks of chunk_size (default:
+    sentiment_batch_size) which are sent concurrently. Returns one result
+    per text, in input order, shaped like {"sentiment", "scores"}; texts
+    whose chunk failed yield None.
+    """
+    results, pending, chunks = _plan_batch(list(texts), chunk_size)
+    if not chunks:
+        return results
+    if len(chunks) == 1:
+        scored = _analyze_batch_chunk(chunks[0])
+    else:
+        workers = max(1, min(sentiment_max_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            scored = [r for part in pool.map(bind(_analyze_batch_chunk), chunks) for r in part]
+    return _merge_batch(results, pending, scored)
+
+
+def send_review(data_dict: dict):
+    """
+    post_review() that also says how the backend answered: returns
+    (status, result), the HTTP status (None if the backend could not be
+    reached) and the parsed reply (None if it was not JSON). An error
+    status is returned rather than raised, with the backend's reply.
+    """
+    request_url = backend_url + "/insert_review"
+    logger.debug("POST %s with payload keys %s", request_url, list(data_dict))
+    try:
+        response = get_client(request_url).post(request_url, json=data_dict)
+    except requests.HTTPError as err:
+        _log_failure("POST", request_url, err)
+        response = err.response
+    except Exception as err:
+        _log_failure("POST", request_url, err)
+        return None, None
+    try:
+        result = response.json()
+    except ValueError:
+        result = None
+    logger.debug("POST %s returned %s %s", request_url, response.status_code, result)
+    return response.status_code, result
+
+
 def post_review(data_dict: dict):
     """
     Posts a review to the Node backend /insert_review endpoint.
     Expects a dict with keys like:
       name, dealership, review, purchase, purchase_date, car_make, car_model, car_year
+    Returns the backend's reply, or None if the review was not accepted.
     """
-    request_url = backend_url + "/insert_review"
-    print(f"POST to {request_url} with payload keys: {list(data_dict.keys())}")
+    status, result = send_review(data_dict)
+    return result if status is not None and status < 400 else None
+
+
+# ------------------------
+# Async variants (ASGI views)
+# ------------------------
+
+
+async def aget_request(endpoint, **kwargs):
+    """Async get_request(); returns parsed JSON or None on failure."""
+    if not endpoint.startswith("/"):
+        endpoint = "/" + endpoint
+
+    request_url = backend_url + endpoint
+    params = kwargs or None
+
+    logger.debug("GET %s params=%s", request_url, params)
+
+    async def fetch():
+        response = await get_async_client(request_url).get(request_url, params=params)
+        return response.json()
+
     try:
-        response = requests.post(request_url, json=data_dict, timeout=10)
-        response.raise_for_status()
-        print(response.json())
+        return await inflight.ado(_get_key(request_url, params), fetch)
+    except Exception as err:
+        _log_failure("GET", request_url, err)
+        return None
+
+
+async def aanalyze_review_sentiments(text: str):
+    """Async analyze_review_sentiments(), sharing the same result cache."""
+    cached = await sync_to_async(sentiment_cache.get, thread_sensitive=False)(text)
+    if cached is not None:
+        return cached
+    request_url = sentiment_analyzer_url + "analyze/" + quote(text, safe="")
+    logger.debug("Sentiment GET %s", request_url)
+
+    async def fetch():
+        response = await get_async_client(request_url).get(request_url)
         return response.json()
+
+    try:
+        result = await inflight.ado(_get_key(request_url), fetch)
+        await sync_to_async(sentiment_cache.set, thread_sensitive=False)(text, result)
+        return result
+    except Exception as err:
+        _log_failure("Sentiment GET", request_url, err)
+        return None
+
+
+async def aanalyze_review_sentiments_many(texts, max_workers=None):
+    """Async analyze_review_sentiments_many(): gather under a semaphore."""
+    texts = list(texts)
+    limit = asyncio.Semaphore(max(1, max_workers or sentiment_max_workers))
+
+    async def score(text):
+        async with limit:
+            return await aanalyze_review_sentiments(text)
+
+    return list(await asyncio.gather(*(score(t) for t in texts)))
+
+
+async def _aanalyze_batch_chunk(texts):
+    request_url = sentiment_analyzer_url.rstrip("/") + "/analyze_batch"
+    logger.debug("Sentiment POST %s with %s texts", request_url, len(texts))
+    try:
+        response = await get_async_client(request_url).post(request_url, json=texts)
+        results = response.json().get("results") or []
+        if len(results) != len(texts):
+            raise ValueError(f"expected {len(texts)} results, got {len(results)}")
+        return results
+    except Exception as err:
+        _log_failure("Sentiment POST", request_url, err)
+        return [None] * len(texts)
+
+
+async def aanalyze_review_sentiments_batch(texts, chunk_size=None):
+    """Async analyze_review_sentiments_batch(); chunks are sent concurrently."""
+    results, pending, chunks = await sync_to_async(_plan_batch, thread_sensitive=False)(
+        list(texts), chunk_size
+    )
+    if not chunks:
+        return results
+    limit = asyncio.Semaphore(max(1, sentiment_max_workers))
+
+    async def send(chunk):
+        async with limit:
+            return await _aanalyze_batch_chunk(chunk)
+
+    parts = await asyncio.gather(*(send(c) for c in chunks))
+    scored = [r for part in parts for r in part]
+    return await sync_to_async(_merge_batch, thread_sensitive=False)(results, pending, scored)
+
+
+async def apost_review(data_dict: dict):
+    """Async post_review()."""
+    request_url = backend_url + "/insert_review"
+    logger.debug("POST %s with payload keys %s", request_url, list(data_dict))
+    try:
+        response = await get_async_client(request_url).post(request_url, json=data_dict)
+        result = response.json()
+        logger.debug("POST %s returned %s", request_url, result)
+        return result
     except Exception as err:
-        print(f"Network exception occurred while posting review: {err}")
+        _log_failure("POST", request_url, err)
         return None
@@ -0,0 +1,220 @@
+"""
+Local mirror of the backend's reviews collection.
+
+Reviews are only ever appended upstream and their ids only grow, so the
+mirror catches up incrementally: sync() asks /fetchReviews for the rows
+above the highest id stored (after_id + limit, one page at a time) and
+upserts them into MirroredReview. get_dealer_reviews pages through the
+mirror on its (dealer_id, review_id) index, so a page costs the same
+however many reviews a dealer has.
+
+An empty mirror is filled inline by the first read; after that a mirror
+older than review_mirror_sync_seconds is refreshed in the background,
+like the dealer directory. `manage.py sync_reviews` runs a sync from cron.
+Reviews posted through this app are stored by add() as soon as the
+backend accepts them, so they show up before the next sync.
+Syncs also score mirrored reviews that were never scored (e.g. posted by
+other clients), which adds them to the dealer sentiment rollups.
+"""
+import logging
+import os
+import time
+
+from django.db.models import Count, Max
+
+from .models import MirroredReview, ReviewSentiment
+from .refreshable import Refreshable
+
+logger = logging.getLogger(__name__)
+
+# Reviews requested from the backend per page while syncing.
+review_mirror_batch_size = int(os.getenv('review_mirror_batch_size', default="500"))
+# Sync again in the background once the last sync is older than this.
+review_mirror_sync_seconds = int(os.getenv('review_mirror_sync_seconds', default="30"))
+# Re-read this many ids below the cursor on every sync: the backend picks
+# ids as max + 1, so a lower id can become visible after a higher one.
+review_mirror_overlap = int(os.getenv('review_mirror_overlap', default="20"))
+# Score unscored reviews after each sync ("off" leaves them until read).
+review_mirror_score = os.getenv('review_mirror_score', default="on") != "off"
+
+
+def cursor():
+    """Highest review id in the mirror (0 when empty)."""
+    return MirroredReview.objects.aggregate(high=Max("review_id"))["high"] or 0
+
+
+def store(reviews):
+    """Upsert upstream review dicts; returns the number of rows written."""
+    objs = []
+    for review in reviews:
+        try:
+            objs.append(MirroredReview(
+                review_id=int(review["id"]), dealer_id=int(review["dealership"]), payload=review,
+            ))
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Skipping malformed review %r", review.get("id"))
+    if objs:
+        MirroredReview.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["review_id"],
+            update_fields=["dealer_id", "payload", "synced_at"],
+        )
+    return len(objs)
+
+
+def _sync(batch_size=None, score=review_mirror_score):
+    from .restapis import get_request
+    started = time.perf_counter()
+    batch_size = max(1, batch_size or review_mirror_batch_size)
+    after = max(0, cursor() - review_mirror_overlap)
+    fetched = pages = 0
+    while True:
+        page = get_request("/fetchReviews", after_id=after, limit=batch_size)
+        if page is None:
+            return None
+        pages += 1
+        fetched += store(page)
+        high = max((int(r["id"]) for r in page if r.get("id") is not None), default=after)
+        # A short page is the last; a backend that ignores after_id would
+        # return the same rows forever, so stop when the cursor stalls.
+        if len(page) < batch_size or high <= after:
+            break
+        after = high
+    result = {
+        "fetched": fetched,
+        "pages": pages,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if score:
+        result["scored"] = score_unscored()
+    return result
+
+
+def score_unscored(batch_size=None):
+    """
+    Score mirrored reviews without stored sentiment, a batch at a time,
+    and store the results (which updates the dealer rollups). Stops early
+    when a whole batch could not be scored. Returns the number stored.
+    """
+    from .restapis import analyze_review_sentiments_batch, sentiment_batch_size
+    from .sentiment_store import save_results
+    size = max(1, batch_size or sentiment_batch_size)
+    unscored = MirroredReview.objects.exclude(
+        review_id__in=ReviewSentiment.objects.values("review_id")
+    ).order_by("review_id")
+    after = scored = 0
+    while True:
+        rows = list(unscored.filter(review_id__gt=after).values_list("review_id", "payload")[:size])
+        if not rows:
+            return scored
+        after = rows[-1][0]
+        reviews = [payload for _, payload in rows]
+        results = analyze_review_sentiments_batch([r.get("review", "") or "" for r in reviews])
+        stored = save_results(zip(reviews, results))
+        if not stored:
+            return scored
+        scored += stored
+
+
+_mirror = Refreshable("review-mirror", _sync, review_mirror_sync_seconds)
+
+
+def sync(batch_size=None, score=review_mirror_score):
+    """
+    Fetch the reviews above the mirror's cursor and store them, then
+    (with score) score the new ones. Returns the number of rows fetched,
+    or None if the backend could not be reached.
+    """
+    result = _mirror.refresh(batch_size, score)
+    return None if result is None else result["fetched"]
+
+
+def request_sync():
+    """Sync in the background now (e.g. after a review was posted)."""
+    _mirror.refresh_in_background(rerun=True)
+
+
+def add(reviews):
+    """
+    Store reviews this process just posted, so the next read includes
+    them without waiting for a sync, then sync in the background for
+    reviews posted elsewhere.
+    """
+    try:
+        store(reviews)
+    except Exception:
+        logger.exception("Could not mirror %s posted reviews", len(reviews))
+    request_sync()
+
+
+def ensure():
+    """
+    True if the mirror can serve reads. An empty mirror is synced inline
+    on the first read of a process; otherwise a mirror that is stale (or
+    not yet synced by this process) is synced in the background. False
+    only if the mirror is empty and the backend cannot be reached.
+    """
+    if _mirror.is_fresh():
+        return True
+    if _mirror.value is None and not MirroredReview.objects.exists():
+        filled = _mirror.get(score=False) is not None
+        if filled and review_mirror_score:
+            request_sync()  # scores the reviews just filled in
+        return filled
+    _mirror.get(block=False)
+    return True
+
+
+def page(dealer_id, after_id=None, limit=50):
+    """
+    Up to `limit` reviews of a dealer with ids above after_id, in id
+    order, and the after_id of the next page (None on the last one).
+    """
+    rows = MirroredReview.objects.filter(dealer_id=dealer_id)
+    if after_id is not None:
+        rows = rows.filter(review_id__gt=after_id)
+    found = list(rows.order_by("review_id").values_list("review_id", "payload")[:limit + 1])
+    next_after = found[limit - 1][0] if len(found) > limit else None
+    return [payload for _, payload in found[:limit]], next_after
+
+
+def iter_dealer(dealer_id, chunk_size=None):
+    """All reviews of a dealer in id order, read from the mirror in chunks."""
+    rows = MirroredReview.objects.filter(dealer_id=dealer_id).order_by("review_id")
+    return rows.values_list("payload", flat=True).iterator(
+        chunk_size=chunk_size or review_mirror_batch_size
+    )
+
+
+def version(dealer_id):
+    """
+    Values that change whenever a dealer's mirrored reviews or their
+    stored sentiment change, for ETags of its review pages: two
+    aggregates over the dealer's rows instead of serializing a page.
+    """
+    reviews = MirroredReview.objects.filter(dealer_id=dealer_id).aggregate(
+        n=Count("review_id"), high=Max("review_id"), synced=Max("synced_at"),
+    )
+    scores = ReviewSentiment.objects.filter(dealer_id=dealer_id).aggregate(
+        n=Count("review_id"), scored=Max("scored_at"),
+    )
+    return (reviews["n"], reviews["high"], reviews["synced"], scores["n"], scores["scored"])
+
+
+def page_of(reviews, after_id=None, limit=50):
+    """page() over a list of upstream reviews, for when the mirror is unavailable."""
+    reviews = sorted((r for r in reviews if r.get("id") is not None), key=lambda r: r["id"])
+    if after_id is not None:
+        reviews = [r for r in reviews if r["id"] > after_id]
+    next_after = reviews[limit - 1]["id"] if len(reviews) > limit else None
+    return reviews[:limit], next_after
+
+
+def stats():
+    return {
+        "cursor": cursor(),
+        "synced_at": _mirror.loaded_at,
+        "syncing": _mirror.refreshing,
+        "last_sync": _mirror.value,
+    }
@@ -0,0 +1,238 @@
+"""
+Write-behind delivery of reviews to the backend.
+
+submit() stores a review (checked with validate() first) as a
+ReviewSubmission row in the local database, which is the durable spool:
+the caller gets a tracking id right away and nothing is lost if the
+process restarts. A background worker drains due rows in batches through
+send_review(), retrying failures with exponential backoff until
+review_spool_max_attempts is reached; a review the backend rejects with
+a 4xx fails on the first attempt. Delivery is at-least-once: a review
+whose POST succeeded but whose reply was lost is sent again.
+
+The web server starts the worker when it loads (djangoproj/wsgi.py and
+asgi.py call start_on_boot()), so rows left by an earlier process are
+delivered without waiting for new traffic. With review_spool_worker=off,
+run `manage.py drain_review_spool` from cron instead.
+"""
+import logging
+import os
+import random
+import threading
+import uuid
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from . import review_mirror
+from .models import ReviewSubmission
+
+logger = logging.getLogger(__name__)
+
+# Reviews claimed and delivered per round.
+review_spool_batch_size = int(os.getenv('review_spool_batch_size', default="20"))
+# Give up (status "failed") after this many delivery attempts.
+review_spool_max_attempts = int(os.getenv('review_spool_max_attempts', default="8"))
+# Retry delay: backoff_base * 2 ** (attempts - 1) seconds, capped, with jitter.
+review_spool_backoff_base = float(os.getenv('review_spool_backoff_base', default="2"))
+review_spool_backoff_max = float(os.getenv('review_spool_backoff_max', default="300"))
+# A claimed row not finished within this many seconds (e.g. the process
+# died mid-delivery) is picked up again.
+review_spool_lease_seconds = int(os.getenv('review_spool_lease_seconds', default="120"))
+# How often an idle worker looks for due rows.
+review_spool_poll_seconds = float(os.getenv('review_spool_poll_seconds', default="5"))
+# Start the worker with the web server ("off" when cron drains the spool).
+review_spool_worker = os.getenv('review_spool_worker', default="on") != "off"
+
+REQUIRED_FIELDS = (
+    "name", "dealership", "review", "purchase_date", "car_make", "car_model", "car_year",
+)
+
+
+def validate(data):
+    """Field -> message for everything wrong with a review payload."""
+    if not isinstance(data, dict):
+        return {"body": "Expected a JSON object"}
+    errors = {}
+    for field in REQUIRED_FIELDS:
+        value = data.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors[field] = "This field is required"
+    for field in ("dealership", "car_year"):
+        if field not in errors:
+            try:
+                int(data[field])
+            except (TypeError, ValueError):
+                errors[field] = "Must be an integer"
+    if "purchase" in data and not isinstance(data["purchase"], bool):
+        errors["purchase"] = "Must be true or false"
+    return errors
+
+
+def submit(data, user=None):
+    """Spool a validated review payload; returns its ReviewSubmission."""
+    submission = ReviewSubmission.objects.create(
+        payload=data, user=user if user is not None and user.is_authenticated else None
+    )
+    wake()
+    return submission
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`."""
+    delay = min(review_spool_backoff_max, review_spool_backoff_base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_batch(limit=None):
+    """
+    Claim up to `limit` due rows for this worker and return them. The
+    claim is a conditional UPDATE, so concurrent workers (other threads
+    or processes on the same database) never get the same row. Reads
+    go to the default database, which the claim was just written to.
+    """
+    now = timezone.now()
+    rows = ReviewSubmission.objects.using(DEFAULT_DB_ALIAS)
+    due = rows.filter(
+        status__in=[ReviewSubmission.PENDING, ReviewSubmission.SENDING],
+        next_attempt_at__lte=now,
+    )
+    ids = list(due.order_by("next_attempt_at", "id")
+               .values_list("id", flat=True)[:limit or review_spool_batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    due.filter(id__in=ids).update(
+        status=ReviewSubmission.SENDING,
+        claim_token=token,
+        next_attempt_at=now + timedelta(seconds=review_spool_lease_seconds),
+    )
+    return list(rows.filter(claim_token=token).order_by("id"))
+
+
+def _rejected(status):
+    """A 4xx other than timeout/throttling: sending it again cannot help."""
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def _deliver(submission):
+    """Post one claimed submission and record the outcome."""
+    from .restapis import send_review
+    submission.attempts += 1
+    status, result = send_review(submission.payload)
+    if status is not None and status < 400 and isinstance(result, dict) \
+            and result.get("id") is not None:
+        submission.status = ReviewSubmission.DELIVERED
+        submission.review_id = result["id"]
+        submission.delivered_at = timezone.now()
+        submission.last_error = ""
+    else:
+        if status is None:
+            submission.last_error = "Backend unreachable"
+        else:
+            error = result.get("error") if isinstance(result, dict) else result
+            submission.last_error = f"HTTP {status}: {error}"[:500]
+        if _rejected(status) or submission.attempts >= review_spool_max_attempts:
+            submission.status = ReviewSubmission.FAILED
+        else:
+            submission.status = ReviewSubmission.PENDING
+            submission.next_attempt_at = timezone.now() + timedelta(
+                seconds=backoff(submission.attempts)
+            )
+    submission.claim_token = ""
+    submission.save(update_fields=[
+        "status", "attempts", "review_id", "delivered_at", "last_error",
+        "next_attempt_at", "claim_token",
+    ])
+    return result if submission.status == ReviewSubmission.DELIVERED else None
+
+
+def _score(delivered):
+    """Store sentiment for freshly delivered reviews; failures only get logged."""
+    from .restapis import analyze_review_sentiments_batch
+    from .sentiment_store import save_results
+    try:
+        results = analyze_review_sentiments_batch([r.get("review") or "" for r in delivered])
+        save_results(zip(delivered, results))
+    except Exception:
+        logger.exception("Could not score %s spooled reviews", len(delivered))
+
+
+def drain_once(limit=None):
+    """
+    Deliver one batch of due submissions. Returns (delivered, failed)
+    counts; failed includes rows rescheduled for a retry.
+    """
+    delivered = []
+    failed = 0
+    for submission in claim_batch(limit):
+        result = _deliver(submission)
+        if result is None:
+            failed += 1
+        else:
+            delivered.append(result)
+    if delivered:
+        _score(delivered)
+        review_mirror.add(delivered)
+    return len(delivered), failed
+
+
+def counts():
+    """Number of submissions per status."""
+    return dict(ReviewSubmission.objects.values_list("status").annotate(n=Count("id")))
+
+
+# ------------------------
+# Background worker
+# ------------------------
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _run():
+    while True:
+        _wakeup.clear()
+        try:
+            close_old_connections()
+            delivered, failed = drain_once()
+            if delivered or failed:
+                logger.info("Review spool: %s delivered, %s failed", delivered, failed)
+                # A full batch may mean more rows are already due.
+                if delivered + failed >= review_spool_batch_size:
+                    continue
+        except Exception:
+            logger.exception("Review spool round failed")
+        _wakeup.wait(review_spool_poll_seconds)
+
+
+def start_worker():
+    """Start the delivery thread for this process unless it is running."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="review-spool", daemon=True)
+            _worker.start()
+
+
+def start_on_boot():
+    """Called by the WSGI/ASGI entry points: start the worker unless disabled."""
+    if review_spool_worker:
+        start_worker()
+
+
+def wake():
+    """Have the worker look for due rows now (starting it unless disabled)."""
+    if review_spool_worker:
+        start_worker()
+    _wakeup.set()
+
+
+def stats():
+    return {
+        "worker_alive": _worker is not None and _worker.is_alive(),
+        "submissions": counts(),
+    }
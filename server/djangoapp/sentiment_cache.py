@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a review for cache keying.
+    VADER splits on whitespace, so collapsing runs of it (and NFC-normalizing)
+    never changes a score, but case and punctuation do and are kept.
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def text_key(text: str) -> str:
+    """Content address of a review text: sha256 of its normalized form."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return "senti:" + digest
+
+
+class SentimentCache:
+    """
+    Two-tier cache of sentiment results keyed by text_key().
+
+    Tier 1 is a bounded in-process LRU whose entries expire after `ttl`
+    seconds. Tier 2 is an optional Django cache (by alias, e.g. the
+    database cache) so results survive restarts; tier-2 hits are promoted
+    into tier 1. Tier-2 writes are handed to a background writer, so a
+    slow backend never holds up the request that scored the texts; up to
+    max_pending results wait for it, newer ones are dropped beyond that.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, max_entries=10000, ttl=86400, backend_alias=None, max_pending=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.backend_alias = backend_alias or None
+        self.max_pending = max_pending or self.max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._backend = None
+        self._backend_failed = False
+        self._pending = {}
+        self._pending_ready = threading.Condition(self._lock)
+        self._writer = None
+        self._writing = False
+        self.backend_writes = 0
+        self.backend_write_drops = 0
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # -- tier 2 ------------------------------------------------------------
+
+    def _get_backend(self):
+        if self.backend_alias is None or self._backend_failed:
+            return None
+        if self._backend is None:
+            try:
+                from django.core.cache import caches
+                self._backend = caches[self.backend_alias]
+            except Exception as err:
+                logger.warning("Sentiment cache tier 2 disabled: %s", err)
+                self._backend_failed = True
+                return None
+        return self._backend
+
+    def _backend_get_many(self, keys):
+        backend = self._get_backend()
+        if backend is None or not keys:
+            return {}
+        try:
+            return backend.get_many(keys)
+        except Exception as err:
+            logger.warning("Sentiment cache tier 2 read failed: %s", err)
+            return {}
+
+    def _backend_set_many(self, mapping):
+        """Queue a tier-2 write for the background writer."""
+        if self._get_backend() is None or not mapping:
+            return
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            if room < len(mapping):
+                self.backend_write_drops += len(mapping) - max(room, 0)
+                mapping = dict(list(mapping.items())[:max(room, 0)])
+            self._pending.update(mapping)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_behind, name="sentiment-cache-writer", daemon=True
+                )
+                self._writer.start()
+            self._pending_ready.notify()
+
+    def _write_behind(self):
+        from django.db import connections
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._pending_ready.wait()
+                mapping, self._pending = self._pending, {}
+                self._writing = True
+            try:
+                self._backend.set_many(mapping, timeout=self.ttl)
+                with self._lock:
+                    self.backend_writes += len(mapping)
+            except Exception as err:
+                logger.warning("Sentiment cache tier 2 write failed: %s", err)
+            finally:
+                self._writing = False
+                # A database cache backend opened connections in this thread.
+                connections.close_all()
+
+    def flush(self, timeout=5.0):
+        """Wait until queued tier-2 writes have been handed to the backend."""
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._writing) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # -- tier 1 ------------------------------------------------------------
+
+    def _local_get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _local_set(self, key, result, now):
+        expires_at = now + self.ttl if self.ttl else None
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # -- public API ----------------------------------------------------------
+
+    def get_many(self, texts):
+        """
+        Look up each text. Returns a list aligned with `texts` holding the
+        cached result or None for misses.
+        """
+        keys = [text_key(t) for t in texts]
+        results = [None] * len(keys)
+        pending = {}
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                result = self._local_get(key, now)
+                if result is None:
+                    pending.setdefault(key, []).append(i)
+                else:
+                    results[i] = result
+                    self.hits += 1
+
+        found = self._backend_get_many(list(pending))
+        with self._lock:
+            for key, result in found.items():
+                self._local_set(key, result, now)
+                for i in pending.pop(key):
+                    results[i] = result
+                    self.backend_hits += 1
+            self.misses += sum(len(idx) for idx in pending.values())
+        return results
+
+    def get(self, text):
+        return self.get_many([text])[0]
+
+    def set_many(self, pairs):
+        """Store (text, result) pairs in both tiers; None results are skipped."""
+        mapping = {text_key(t): r for t, r in pairs if r is not None}
+        if not mapping:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, result in mapping.items():
+                self._local_set(key, result, now)
+        self._backend_set_many(mapping)
+
+    def set(self, text, result):
+        self.set_many([(text, result)])
+
+    def clear(self):
+        """Drop tier 1 only; tier 2 is shared and cleared through Django."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.backend_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "backend": self.backend_alias if not self._backend_failed else None,
+                "backend_writes": self.backend_writes,
+                "backend_write_pending": len(self._pending),
+                "backend_write_drops": self.backend_write_drops,
+                "hits": self.hits,
+                "backend_hits": self.backend_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": (
+                    round((self.hits + self.backend_hits) / lookups, 4) if lookups else None
+                ),
+            }
@@ -0,0 +1,141 @@
+"""
+Per-dealer sentiment rollups (DealerSentiment), maintained incrementally.
+
+Every sentiment result is stored through sentiment_store.save_results(),
+which passes the ReviewSentiment rows it replaces and the rows it writes
+to apply() inside the same transaction. Each dealer's counters move by
+the difference, so a review added by add_review, the review spool or a
+mirror sync costs one row update, and re-scoring a review moves it
+between labels instead of counting it twice.
+
+summary() and leaderboard() read the precomputed rows on their indexes;
+neither touches the reviews. A dealer's state comes from the dealer
+directory and is refreshed by assign_states() when the directory loads.
+"""
+from collections import defaultdict
+
+from django.db.models import F
+from django.utils import timezone
+
+from .dealer_directory import get_directory
+from .models import DealerSentiment, ReviewSentiment
+
+COUNTERS = ("positive", "neutral", "negative", "compound_sum", "compound_count")
+
+_LABEL_FIELDS = {
+    ReviewSentiment.POSITIVE: "positive",
+    ReviewSentiment.NEUTRAL: "neutral",
+    ReviewSentiment.NEGATIVE: "negative",
+}
+
+
+def _state_of(directory, dealer_id):
+    dealer = directory.get(dealer_id) if directory is not None else None
+    return str(dealer.get("state", "")).lower() if dealer else ""
+
+
+def state_key(state, directory=None):
+    """Stored form of a state given by full name or abbreviation."""
+    directory = directory or get_directory(block=False)
+    dealers = directory.in_state(state) if directory is not None else []
+    return str(dealers[0].get("state", "")).lower() if dealers else state.lower()
+
+
+def _add(deltas, dealer_id, label, compound, sign):
+    if not dealer_id:
+        return
+    delta = deltas[dealer_id]
+    delta[_LABEL_FIELDS.get(label, "neutral")] += sign
+    if compound is not None:
+        delta["compound_sum"] += sign * compound
+        delta["compound_count"] += sign
+
+
+def apply(previous, current):
+    """
+    Move the dealer rollups from `previous` (values() dicts of the
+    ReviewSentiment rows being replaced: dealer_id, label, compound) to
+    `current` (the ReviewSentiment objects replacing them). Must run in
+    the transaction that writes `current`. Returns the dealers updated.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in previous:
+        _add(deltas, row["dealer_id"], row["label"], row["compound"], -1)
+    for obj in current:
+        _add(deltas, obj.dealer_id, obj.label, obj.compound, 1)
+    deltas = {dealer_id: d for dealer_id, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return 0
+
+    rows = {
+        row.dealer_id: row
+        for row in DealerSentiment.objects.select_for_update().filter(dealer_id__in=deltas)
+    }
+    directory = get_directory(block=False)
+    now = timezone.now()
+    created = []
+    for dealer_id, delta in deltas.items():
+        row = rows.get(dealer_id)
+        if row is None:
+            row = DealerSentiment(dealer_id=dealer_id)
+            created.append(row)
+        for field, change in delta.items():
+            setattr(row, field, getattr(row, field) + change)
+        row.mean_compound = (
+            row.compound_sum / row.compound_count if row.compound_count > 0 else None
+        )
+        row.state = row.state or _state_of(directory, dealer_id)
+        row.updated_at = now
+    DealerSentiment.objects.bulk_create(created)
+    DealerSentiment.objects.bulk_update(
+        list(rows.values()), [*COUNTERS, "mean_compound", "state", "updated_at"]
+    )
+    return len(deltas)
+
+
+def assign_states(directory):
+    """Record each dealer's state from a freshly loaded directory."""
+    changed = []
+    for row in DealerSentiment.objects.only("dealer_id", "state"):
+        state = _state_of(directory, row.dealer_id)
+        if state and state != row.state:
+            row.state = state
+            changed.append(row)
+    DealerSentiment.objects.bulk_update(changed, ["state"])
+    return len(changed)
+
+
+def as_dict(row):
+    """Summary of a rollup row; all zero for a dealer without scored reviews."""
+    if row is None:
+        return {"reviews": 0, "positive": 0, "neutral": 0, "negative": 0,
+                "mean_compound": None, "updated_at": None}
+    return {
+        "reviews": row.reviews,
+        "positive": row.positive,
+        "neutral": row.neutral,
+        "negative": row.negative,
+        "mean_compound": None if row.mean_compound is None else round(row.mean_compound, 4),
+        "updated_at": row.updated_at.isoformat(),
+    }
+
+
+def summary(dealer_id):
+    return as_dict(DealerSentiment.objects.filter(dealer_id=dealer_id).first())
+
+
+def leaderboard(state=None, limit=10, min_reviews=1):
+    """
+    (dealer_id, summary) of the `limit` dealers with the highest mean
+    compound score, in one stored state (see state_key()) or overall.
+    Dealers without compound scores rank last.
+    """
+    rows = DealerSentiment.objects.all()
+    if state is not None:
+        rows = rows.filter(state=state)
+    if min_reviews > 1:
+        rows = rows.alias(
+            total=F("positive") + F("neutral") + F("negative")
+        ).filter(total__gte=min_reviews)
+    rows = rows.order_by(F("mean_compound").desc(nulls_last=True), "dealer_id")[:limit]
+    return [(row.dealer_id, as_dict(row)) for row in rows]
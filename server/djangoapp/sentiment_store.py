@@ -0,0 +1,71 @@
+from django.db import transaction
+
+from . import sentiment_rollup
+from .models import ReviewSentiment
+
+SCORE_FIELDS = ("compound", "pos", "neg", "neu")
+
+
+def _label(result):
+    label = (result or {}).get("sentiment") or (result or {}).get("label")
+    if label not in (ReviewSentiment.POSITIVE, ReviewSentiment.NEGATIVE):
+        label = ReviewSentiment.NEUTRAL
+    return label
+
+
+def _as_result(row):
+    """Stored row (a values() dict) in the sentiment service's reply shape."""
+    result = {"sentiment": row["label"]}
+    if row["compound"] is not None:
+        result["scores"] = {f: row[f] for f in SCORE_FIELDS}
+    return result
+
+
+def stored_results(reviews):
+    """
+    Stored sentiment for each upstream review dict, aligned with `reviews`;
+    None where the review has not been scored yet.
+    """
+    ids = [r.get("id") for r in reviews]
+    rows = ReviewSentiment.objects.filter(
+        review_id__in=[i for i in ids if i is not None]
+    ).values("review_id", "label", *SCORE_FIELDS)
+    by_id = {row["review_id"]: _as_result(row) for row in rows}
+    return [by_id.get(i) for i in ids]
+
+
+def save_results(pairs):
+    """
+    Upsert (review dict, sentiment result) pairs into ReviewSentiment in
+    one statement and move the dealer rollups by the difference (see
+    sentiment_rollup). Pairs without a result or an upstream review id
+    are skipped. Returns the number of rows written.
+    """
+    objs = {}
+    for review, result in pairs:
+        review_id = review.get("id")
+        if result is None or review_id is None:
+            continue
+        scores = result.get("scores") or {}
+        objs[review_id] = ReviewSentiment(
+            review_id=review_id,
+            dealer_id=review.get("dealership") or 0,
+            label=_label(result),
+            **{f: scores.get(f) for f in SCORE_FIELDS},
+        )
+    if not objs:
+        return 0
+    with transaction.atomic():
+        previous = list(
+            ReviewSentiment.objects.select_for_update()
+            .filter(review_id__in=list(objs))
+            .values("dealer_id", "label", "compound")
+        )
+        ReviewSentiment.objects.bulk_create(
+            list(objs.values()),
+            update_conflicts=True,
+            unique_fields=["review_id"],
+            update_fields=["dealer_id", "label", *SCORE_FIELDS, "scored_at"],
+        )
+        sentiment_rollup.apply(previous, objs.values())
+    return len(objs)
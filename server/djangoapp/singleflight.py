@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: between threads with do(), and
+    between tasks on the same event loop with ado().
+
+    While a call for `key` is in flight, further do()/ado() calls with the
+    same key wait for it and get its result (or its exception) instead of
+    issuing their own. Results are shared objects: callers must not
+    mutate them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = weakref.WeakKeyDictionary()  # event loop -> {key: task}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once for all threads asking for `key` at the same time."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, coro_fn):
+        """
+        Async do(): one task runs coro_fn() per key and event loop; every
+        caller awaits it through shield(), so a cancelled caller does not
+        cancel the shared call.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.calls += 1
+            tasks = self._tasks.setdefault(loop, {})
+            task = tasks.get(key)
+            if task is None:
+                task = tasks[key] = loop.create_task(coro_fn())
+                task.add_done_callback(lambda _: self._forget(tasks, key))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, tasks, key):
+        with self._lock:
+            tasks.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + sum(len(t) for t in self._tasks.values()),
+            }
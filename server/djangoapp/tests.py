@@ -0,0 +1,195 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from djangoapp import review_mirror, review_spool
+from djangoapp.conditional import conditional_json
+from djangoapp.models import ReviewSubmission
+
+REVIEW = {
+    "name": "Berkly Shepley", "dealership": 15, "review": "Total grid-enabled service-desk",
+    "purchase": True, "purchase_date": "07/11/2020", "car_make": "Audi", "car_model": "A6",
+    "car_year": 2010,
+}
+
+
+# ------------------------
+# Review spool
+# ------------------------
+
+
+class ReviewSpoolValidateTests(TestCase):
+    def test_accepts_complete_review(self):
+        self.assertEqual(review_spool.validate(REVIEW), {})
+
+    def test_reports_each_problem(self):
+        errors = review_spool.validate(
+            dict(REVIEW, name="  ", dealership="x", purchase="yes", car_year=None)
+        )
+        self.assertEqual(set(errors), {"name", "dealership", "purchase", "car_year"})
+        self.assertEqual(errors["dealership"], "Must be an integer")
+        self.assertEqual(errors["car_year"], "This field is required")
+
+    def test_rejects_non_object(self):
+        self.assertEqual(review_spool.validate([REVIEW]), {"body": "Expected a JSON object"})
+
+
+class ReviewSpoolClaimTests(TestCase):
+    def spool(self, **fields):
+        return ReviewSubmission.objects.create(payload=REVIEW, **fields)
+
+    def test_claims_due_rows_once(self):
+        due = self.spool()
+        self.spool(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.spool(status=ReviewSubmission.DELIVERED)
+
+        claimed = review_spool.claim_batch()
+        self.assertEqual([s.pk for s in claimed], [due.pk])
+        self.assertEqual(claimed[0].status, ReviewSubmission.SENDING)
+        self.assertTrue(claimed[0].claim_token)
+        self.assertGreater(claimed[0].next_attempt_at, timezone.now())
+        self.assertEqual(review_spool.claim_batch(), [])
+
+    def test_reclaims_expired_lease(self):
+        stuck = self.spool(status=ReviewSubmission.SENDING, claim_token="old",
+                           next_attempt_at=timezone.now() - timedelta(seconds=1))
+        claimed = review_spool.claim_batch()
+        self.assertEqual([s.pk for s in claimed], [stuck.pk])
+        self.assertNotEqual(claimed[0].claim_token, "old")
+
+    def test_respects_limit(self):
+        for _ in range(3):
+            self.spool()
+        self.assertEqual(len(review_spool.claim_batch(limit=2)), 2)
+        self.assertEqual(len(review_spool.claim_batch(limit=2)), 1)
+
+
+@mock.patch("djangoapp.restapis.send_review")
+class ReviewSpoolDeliverTests(TestCase):
+    def claim(self, attempts=0):
+        ReviewSubmission.objects.create(payload=REVIEW, attempts=attempts)
+        return review_spool.claim_batch()[0]
+
+    def test_delivered(self, send_review):
+        send_review.return_value = (200, dict(REVIEW, id=42))
+        submission = self.claim()
+        self.assertEqual(review_spool._deliver(submission)["id"], 42)
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, ReviewSubmission.DELIVERED)
+        self.assertEqual(submission.review_id, 42)
+        self.assertEqual(submission.claim_token, "")
+        self.assertIsNotNone(submission.delivered_at)
+
+    def test_unreachable_is_retried(self, send_review):
+        send_review.return_value = (None, None)
+        submission = self.claim()
+        self.assertIsNone(review_spool._deliver(submission))
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, ReviewSubmission.PENDING)
+        self.assertEqual(submission.attempts, 1)
+        self.assertEqual(submission.last_error, "Backend unreachable")
+        self.assertGreater(submission.next_attempt_at, timezone.now())
+
+    def test_server_error_is_retried(self, send_review):
+        send_review.return_value = (500, {"error": "Error inserting review"})
+        submission = self.claim()
+        review_spool._deliver(submission)
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, ReviewSubmission.PENDING)
+        self.assertEqual(submission.last_error, "HTTP 500: Error inserting review")
+
+    def test_rejected_fails_at_once(self, send_review):
+        send_review.return_value = (422, {"error": "dealership unknown"})
+        submission = self.claim()
+        self.assertIsNone(review_spool._deliver(submission))
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, ReviewSubmission.FAILED)
+        self.assertEqual(submission.attempts, 1)
+        self.assertEqual(submission.last_error, "HTTP 422: dealership unknown")
+
+    def test_gives_up_after_max_attempts(self, send_review):
+        send_review.return_value = (None, None)
+        submission = self.claim(attempts=review_spool.review_spool_max_attempts - 1)
+        review_spool._deliver(submission)
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, ReviewSubmission.FAILED)
+
+# ------------------------
+# Review mirror
+# ------------------------
+
+
+class ReviewMirrorPageTests(TestCase):
+    def setUp(self):
+        review_mirror.store(
+            [dict(REVIEW, id=i, dealership=15) for i in (5, 1, 9, 3, 7)]
+            + [dict(REVIEW, id=2, dealership=16), {"id": "bad"}]
+        )
+
+    def test_pages_in_id_order(self):
+        reviews, next_after = review_mirror.page(15, limit=2)
+        self.assertEqual([r["id"] for r in reviews], [1, 3])
+        self.assertEqual(next_after, 3)
+        reviews, next_after = review_mirror.page(15, after_id=next_after, limit=2)
+        self.assertEqual([r["id"] for r in reviews], [5, 7])
+        reviews, next_after = review_mirror.page(15, after_id=next_after, limit=2)
+        self.assertEqual([r["id"] for r in reviews], [9])
+        self.assertIsNone(next_after)
+
+    def test_full_last_page_has_no_next(self):
+        reviews, next_after = review_mirror.page(15, after_id=5, limit=2)
+        self.assertEqual([r["id"] for r in reviews], [7, 9])
+        self.assertIsNone(next_after)
+
+    def test_other_dealers_and_unknown(self):
+        self.assertEqual([r["id"] for r in review_mirror.page(16)[0]], [2])
+        self.assertEqual(review_mirror.page(99), ([], None))
+
+    def test_page_of_matches_page(self):
+        upstream = [dict(REVIEW, id=i) for i in (5, 1, 9, 3, 7)]
+        for after_id in (None, 3, 7):
+            self.assertEqual(
+                [r["id"] for r in review_mirror.page_of(upstream, after_id, 2)[0]],
+                [r["id"] for r in review_mirror.page(15, after_id, 2)[0]],
+            )
+
+    def test_version_changes_with_reviews(self):
+        before = review_mirror.version(15)
+        self.assertEqual(review_mirror.version(15), before)
+        review_mirror.store([dict(REVIEW, id=11, dealership=15)])
+        self.assertNotEqual(review_mirror.version(15), before)
+
+# ------------------------
+# Conditional GET
+# ------------------------
+
+
+class ConditionalJsonTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.build = mock.Mock(return_value={"status": 200, "cars": []})
+
+    def test_matching_etag_is_304_without_building(self):
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH='"v1"')
+        response = conditional_json(request, "v1", self.build, max_age=60)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.build.assert_not_called()
+
+    def test_other_etag_builds_body(self):
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH='"v0"')
+        response = conditional_json(request, "v1", self.build)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertJSONEqual(response.content, {"status": 200, "cars": []})
+        self.build.assert_called_once()
+
+    def test_without_version_etag_is_body_digest(self):
+        first = conditional_json(self.factory.get("/"), None, self.build)
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        response = conditional_json(request, None, self.build)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.build.call_count, 2)
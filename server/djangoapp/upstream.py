@@ -0,0 +1,299 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .instrumentation import record, upstream_route, upstream_span
+from .resilience import Guard
+
+try:
+    import httpx
+except ImportError:  # async calls fall back to the sync client in a thread
+    httpx = None
+
+# Connections kept open per upstream host; size it to at least the number of
+# threads that call one host concurrently (see sentiment_max_workers).
+pool_size = int(os.getenv('upstream_pool_size', default="20"))
+connect_timeout = float(os.getenv('upstream_connect_timeout', default="3.05"))
+read_timeout = float(os.getenv('upstream_read_timeout', default="10"))
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP client for one upstream host (scheme://host:port).
+
+    Wraps a requests.Session with a pooled HTTPAdapter so calls reuse TCP
+    (and TLS) connections, applies separate connect/read timeouts, and
+    counts requests for monitoring. Calls go through the host's Guard
+    (bulkhead, per-route adaptive read timeout, circuit breaker; see
+    resilience.py) and raise UpstreamUnavailable when it turns them away.
+    Safe to share between threads.
+    """
+
+    def __init__(self, origin, pool_size=pool_size,
+                 connect_timeout=connect_timeout, read_timeout=read_timeout):
+        self.origin = origin
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+        self.guard = Guard(read_timeout)
+
+    def current_timeout(self, route):
+        """(connect, read) timeout for a route ("GET /path"), the read part
+        adapted to its recent latency (idempotent methods only)."""
+        return (self.timeout[0], self.guard.timeout(route).current())
+
+    def request(self, method, url, params=None, json=None, timeout=None):
+        """
+        Send a request and return the Response; raises on network errors
+        and non-2xx statuses like response.raise_for_status() would.
+        """
+        route = upstream_route(method, url)
+        self.guard.enter()
+        started = self._begin()
+        error = None
+        try:
+            response = self.session.request(
+                method, url, params=params, json=json,
+                timeout=timeout or self.current_timeout(route),
+            )
+            response.raise_for_status()
+            return response
+        except Exception as err:
+            error = err
+            raise
+        finally:
+            elapsed = self._end(started, error is not None)
+            self.guard.exit(route, elapsed, error)
+            record(upstream_span(method, url), elapsed)
+
+    @contextmanager
+    def stream(self, method, url, params=None, timeout=None):
+        """
+        request() with the body left unread (requests' stream=True): yields
+        the Response for iter_content(). The call holds its bulkhead slot
+        and is timed until the block exits, i.e. until the body is consumed;
+        the adaptive timeout only learns the wait for the response headers,
+        since the read timeout applies to each read, not to the whole body.
+        """
+        route = upstream_route(method, url)
+        self.guard.enter()
+        started = self._begin()
+        error = None
+        response = None
+        waited = None
+        try:
+            response = self.session.request(
+                method, url, params=params, timeout=timeout or self.current_timeout(route),
+                stream=True,
+            )
+            waited = time.perf_counter() - started
+            response.raise_for_status()
+            yield response
+        except Exception as err:
+            error = err
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            elapsed = self._end(started, error is not None)
+            self.guard.exit(route, elapsed if waited is None else waited, error)
+            record(upstream_span(method, url), elapsed)
+
+    def _begin(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def _end(self, started, failed):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += elapsed
+            if failed:
+                self.errors += 1
+        return elapsed
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, json=None, **kwargs):
+        return self.request("POST", url, json=json, **kwargs)
+
+    def stats(self):
+        """Request counters plus the state of the underlying urllib3 pools."""
+        pools = []
+        container = self.adapter.poolmanager.pools
+        for key in container.keys():
+            pool = container.get(key)
+            if pool is None:
+                continue
+            # The pool queue is pre-filled with None placeholders; only real
+            # connections count as idle.
+            idle = [c for c in list(pool.pool.queue) if c is not None] if pool.pool else []
+            pools.append({
+                "host": pool.host,
+                "port": pool.port,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": len(idle),
+            })
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "connect_timeout": self.timeout[0],
+                "read_timeout": self.timeout[1],
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "avg_ms": (
+                    round(self.total_seconds * 1000 / self.requests, 2) if self.requests else None
+                ),
+                "pools": pools,
+                **self.guard.stats(),
+            }
+
+
+class AsyncUpstreamClient:
+    """
+    Async counterpart of UpstreamClient for ASGI views.
+
+    Uses a pooled httpx.AsyncClient when httpx is installed; otherwise each
+    call runs the shared sync client in a worker thread. httpx clients are
+    bound to an event loop, so one is kept per running loop. Counters are
+    shared with the sync client for the same origin.
+    """
+
+    def __init__(self, sync_client):
+        self.sync = sync_client
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            connect, read = self.sync.timeout
+            client = self._clients[loop] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    # As many connections as the async bulkhead admits calls
+                    max_connections=max(self.sync.pool_size,
+                                        self.sync.guard.async_bulkhead.limit),
+                    max_keepalive_connections=self.sync.pool_size,
+                ),
+                timeout=httpx.Timeout(read, connect=connect),
+            )
+        return client
+
+    async def request(self, method, url, params=None, json=None, timeout=None):
+        """
+        Send a request and return the response (requests.Response or
+        httpx.Response; both offer .json()). Raises on errors and non-2xx.
+        """
+        if httpx is None:
+            from asgiref.sync import sync_to_async
+            return await sync_to_async(self.sync.request, thread_sensitive=False)(
+                method, url, params=params, json=json, timeout=timeout
+            )
+        # The async bulkhead never waits for a slot: that would block the loop.
+        route = upstream_route(method, url)
+        self.sync.guard.enter(asynchronous=True)
+        started = self.sync._begin()
+        error = None
+        cancelled = False
+        try:
+            timeout = timeout or self.sync.current_timeout(route)
+            connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+            response = await self._http().request(
+                method, url, params=params, json=json,
+                timeout=httpx.Timeout(read, connect=connect),
+            )
+            response.raise_for_status()
+            return response
+        except Exception as err:
+            error = err
+            raise
+        except BaseException:
+            # asyncio.CancelledError (client disconnect, caller's timeout):
+            # the elapsed time says nothing about the upstream.
+            cancelled = True
+            raise
+        finally:
+            elapsed = self.sync._end(started, error is not None)
+            if cancelled:
+                self.sync.guard.cancel(asynchronous=True)
+            else:
+                self.sync.guard.exit(route, elapsed, error, asynchronous=True)
+            record(upstream_span(method, url), elapsed)
+
+    async def get(self, url, params=None, **kwargs):
+        return await self.request("GET", url, params=params, **kwargs)
+
+    async def post(self, url, json=None, **kwargs):
+        return await self.request("POST", url, json=json, **kwargs)
+
+
+_clients = {}
+_async_clients = {}
+_clients_lock = threading.Lock()
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_client(url):
+    """Shared UpstreamClient for the host that `url` points at."""
+    origin = origin_of(url)
+    client = _clients.get(origin)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(origin)
+            if client is None:
+                client = _clients[origin] = UpstreamClient(origin)
+    return client
+
+
+def get_async_client(url):
+    """Shared AsyncUpstreamClient for the host that `url` points at."""
+    origin = origin_of(url)
+    client = _async_clients.get(origin)
+    if client is None:
+        sync_client = get_client(url)
+        with _clients_lock:
+            client = _async_clients.get(origin)
+            if client is None:
+                client = _async_clients[origin] = AsyncUpstreamClient(sync_client)
+    return client
+
+
+def stats():
+    """Pool statistics for every upstream contacted so far, keyed by origin."""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {origin: client.stats() for origin, client in clients.items()}
+
+
+def guard_states():
+    """Circuit, bulkhead and timeout state for every upstream, keyed by origin."""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {origin: client.guard.stats() for origin, client in clients.items()}
@@ -10,17 +10,60 @@ urlpatterns = [
 
     # cars (admin data helper)
     path('get_cars', views.get_cars, name='getcars'),
+    path('car_catalog', views.get_car_catalog, name='car_catalog'),
+
+    # dealer inventory (in-memory index)
+    path('inventory', views.get_inventory, name='inventory'),
 
     # dealerships
     path('get_dealers', views.get_dealerships, name='get_dealers'),
     path('get_dealers/<str:state>', views.get_dealerships, name='get_dealers_by_state'),
 
+    # nearest dealers (local directory, spatial index)
+    path('dealers/near', views.get_dealers_near, name='get_dealers_near'),
+
+    # drop cached dealer data (staff, POST)
+    path('dealers/invalidate', views.invalidate_dealer_cache, name='invalidate_dealer_cache'),
+
     # dealer details
     path('get_dealer/<int:dealer_id>', views.get_dealer_details, name='get_dealer'),
 
     # dealer reviews + sentiment
     path('get_dealer_reviews/<int:dealer_id>', views.get_dealer_reviews, name='get_dealer_reviews'),
 
+    # dealer page: dealer, reviews and cars in one response
+    path('dealer_page/<int:dealer_id>', views.get_dealer_page, name='dealer_page'),
+
+    # precomputed sentiment rollups: one dealer, and top dealers overall / by state
+    path('dealer_sentiment/<int:dealer_id>', views.get_dealer_sentiment,
+         name='dealer_sentiment'),
+    path('dealers/leaderboard', views.get_sentiment_leaderboard, name='sentiment_leaderboard'),
+    path('dealers/leaderboard/<str:state>', views.get_sentiment_leaderboard,
+         name='sentiment_leaderboard_by_state'),
+
     # add review (POST)
     path('add_review', views.add_review, name='add_review'),
+
+    # write-behind review submission (spooled, delivered in the background)
+    path('reviews/submit', views.submit_review, name='submit_review'),
+    path('reviews/submissions/<uuid:tracking_id>', views.get_review_submission,
+         name='review_submission'),
+
+    # async (ASGI) variants of the proxy views
+    path('async/get_dealers', views.get_dealerships_async, name='get_dealers_async'),
+    path('async/get_dealers/<str:state>', views.get_dealerships_async,
+         name='get_dealers_by_state_async'),
+    path('async/get_dealer/<int:dealer_id>', views.get_dealer_details_async,
+         name='get_dealer_async'),
+    path('async/get_dealer_reviews/<int:dealer_id>', views.get_dealer_reviews_async,
+         name='get_dealer_reviews_async'),
+    path('async/dealer_page/<int:dealer_id>', views.get_dealer_page_async,
+         name='dealer_page_async'),
+    path('async/add_review', views.add_review_async, name='add_review_async'),
+
+    # runtime metrics
+    path('metrics', views.get_metrics, name='metrics'),
+
+    # circuit breaker / bulkhead state of each upstream
+    path('upstreams', views.get_upstream_state, name='upstream_state'),
 ]
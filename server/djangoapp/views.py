@@ -1,13 +1,45 @@
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F
 from django.contrib.auth import login, authenticate, logout
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from django.views.decorators.csrf import csrf_exempt
+import asyncio
+import itertools
 import json
 import logging
-import urllib.parse
 
-from .models import CarMake, CarModel
-from .populate import initiate
-from .restapis import get_request, analyze_review_sentiments, post_review
+from . import (
+    dealer_directory, instrumentation, inventory, review_mirror, review_spool,
+    sentiment_rollup, upstream,
+)
+from .instrumentation import JsonResponse, bind
+from .conditional import (
+    cars_version, conditional_json, digest, not_modified, payload_digest,
+)
+from .models import CarMake, CarModel, ReviewSubmission
+from .dealer_directory import get_directory, invalidate_directory
+from .jsonstream import iter_json_dump
+from .sentiment_store import save_results, stored_results
+from .response_cache import dealer_cache, dealer_key, dealers_key, invalidate_dealers
+from .restapis import (
+    get_request,
+    aget_request,
+    stream_request,
+    analyze_review_sentiments_batch,
+    analyze_review_sentiments_many,
+    aanalyze_review_sentiments_batch,
+    aanalyze_review_sentiments_many,
+    post_review,
+    apost_review,
+    inflight,
+    sentiment_batch_size,
+    sentiment_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,65 +75,607 @@ def logout_user(request):
 # ------------------------
 
 
+# Clients revalidate with the ETag (a version bumped on any car change).
+CARS_CACHE_CONTROL = {"public": True, "no_cache": True}
+
+
 def get_cars(request):
-    count = CarMake.objects.count()
-    if count == 0:
-        initiate()
-    car_models = CarModel.objects.select_related('make')
-    cars = []
-    for car_model in car_models:
-        cars.append({
-            "CarModel": car_model.name,
-            "CarMake": car_model.make.name
-        })
-    return JsonResponse({"CarModels": cars})
+    # Seeding happens after migrate (see DjangoappConfig.ready), not here.
+    def build():
+        car_models = CarModel.objects.values_list("name", "make__name")
+        return {"CarModels": [{"CarModel": name, "CarMake": make} for name, make in car_models]}
+    return conditional_json(request, f"cars-{cars_version()}", build, **CARS_CACHE_CONTROL)
+
+
+CATALOG_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 500
+
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+def get_car_catalog(request):
+    """
+    Filterable, keyset-paginated car catalog.
+    Filters: make (name, case-insensitive) or make_id, type, year_min,
+    year_max, dealer_id. Paging: limit and after (the last id seen);
+    the response's "next" is the `after` value for the following page.
+    """
+    try:
+        make_id = _int_param(request, "make_id")
+        dealer_id = _int_param(request, "dealer_id")
+        year_min = _int_param(request, "year_min")
+        year_max = _int_param(request, "year_max")
+        after = _int_param(request, "after")
+        limit = _int_param(request, "limit") or CATALOG_PAGE_SIZE
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+    limit = max(1, min(limit, CATALOG_MAX_PAGE_SIZE))
+
+    cars = CarModel.objects.all()
+    make_name = request.GET.get("make")
+    if make_name:
+        # Resolve the name once against the small CarMake table so the
+        # CarModel query filters on the indexed make_id column.
+        make_id = (
+            CarMake.objects.filter(name__iexact=make_name)
+            .values_list("id", flat=True).first()
+        )
+        if make_id is None:
+            return JsonResponse({"status": 200, "cars": [], "next": None})
+    if make_id is not None:
+        cars = cars.filter(make_id=make_id)
+    if request.GET.get("type"):
+        cars = cars.filter(type=request.GET["type"])
+    if dealer_id is not None:
+        cars = cars.filter(dealer_id=dealer_id)
+    if year_min is not None:
+        cars = cars.filter(year__gte=year_min)
+    if year_max is not None:
+        cars = cars.filter(year__lte=year_max)
+    if after is not None:
+        cars = cars.filter(id__gt=after)
+
+    page = list(
+        cars.order_by("id")
+        .values("id", "name", "type", "year", "dealer_id", "make_id", make_name=F("make__name"))
+        [:limit + 1]
+    )
+    next_after = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_after = page[-1]["id"]
+    return JsonResponse({"status": 200, "cars": page, "next": next_after})
+
+# ------------------------
+# Dealer inventory (in-memory index)
+# ------------------------
+
+
+def get_inventory(request):
+    """
+    Query dealer inventory from the in-memory index.
+    Filters: dealer_id, make, model, body_type, year_min, year_max,
+    mileage_min, mileage_max. sort: year, mileage, -year or -mileage.
+    Paging: limit (max 500) and offset.
+    """
+    try:
+        params = {
+            name: _int_param(request, name)
+            for name in ("dealer_id", "year_min", "year_max", "mileage_min", "mileage_max")
+        }
+        limit = max(1, min(_int_param(request, "limit") or CATALOG_PAGE_SIZE,
+                           CATALOG_MAX_PAGE_SIZE))
+        offset = max(0, _int_param(request, "offset") or 0)
+    except ValueError as err:
+        return JsonResponse({"status": 400, "message": str(err)}, status=400)
+    try:
+        index = inventory.get_inventory()
+    except Exception:
+        # The first load of this process failed: file missing or
+        # unreadable, or the inventory endpoint down.
+        logger.exception("Could not load the inventory index")
+        return JsonResponse({"status": 503, "message": "Inventory unavailable"}, status=503)
+    try:
+        total, cars = index.query(
+            make=request.GET.get("make"),
+            model=request.GET.get("model"),
+            body_type=request.GET.get("body_type"),
+            sort=request.GET.get("sort"),
+            limit=limit,
+            offset=offset,
+            **params,
+        )
+    except ValueError as err:
+        return JsonResponse({"status": 400, "message": str(err)}, status=400)
+    return JsonResponse({"status": 200, "count": total, "cars": cars})
+
+# ------------------------
+# Streamed responses
+# ------------------------
+
+
+def _wants_stream(request):
+    return request.GET.get("stream") in ("1", "true")
+
+
+async def _async_chunks(chunks):
+    """
+    Async iterator over a sync one, a chunk at a time. Under ASGI Django
+    would otherwise read a sync streaming body whole (sync_to_async(list))
+    before sending any of it. next() runs on the request's sync thread,
+    which holds any database cursor the iterator reads from.
+    """
+    step = sync_to_async(next)
+    done = object()
+    try:
+        while True:
+            chunk = await step(chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def _streaming_json(request, key, items, **cache_control):
+    """
+    {"status": 200, key: [...]} encoded and sent item by item as `items`
+    is consumed, under WSGI and ASGI alike. No ETag: the body is not known
+    before it is sent.
+    """
+    chunks = iter_json_dump(items, key, {"status": 200}, encoder=DjangoJSONEncoder)
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type="application/json")
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def _primed(items):
+    """
+    Start an iterator (e.g. stream_request()) so that a failure before its
+    first item is raised here, while the view can still answer otherwise.
+    """
+    items = iter(items)
+    try:
+        first = next(items)
+    except StopIteration:
+        return iter(())
+    return itertools.chain((first,), items)
 
 # ------------------------
 # Dealership API
 # ------------------------
 
 
-def get_dealerships(request, state="All"):
+# Dealer data changes rarely; reviews are revalidated on every request.
+DEALERS_CACHE_CONTROL = {"public": True, "max_age": 60}
+REVIEWS_CACHE_CONTROL = {"public": True, "no_cache": True}
+
+
+def _dealers_endpoint(state):
     if state == "All":
-        endpoint = "/fetchDealers"
+        return "/fetchDealers"
+    return "/fetchDealers/" + state
+
+
+def _dealer_stream(state):
+    """Dealers for a streamed response: the directory's, else the backend's
+    list streamed through as it is parsed."""
+    directory = get_directory()
+    if directory is not None:
+        return directory.dealers if state == "All" else directory.in_state(state)
+    try:
+        return _primed(stream_request(_dealers_endpoint(state)))
+    except Exception:
+        return iter(())
+
+
+def get_dealerships(request, state="All"):
+    # Served from the local dealer directory; the cached upstream call is
+    # only the fallback while the directory cannot be loaded.
+    if _wants_stream(request):
+        return _streaming_json(request, "dealers", _dealer_stream(state),
+                               **DEALERS_CACHE_CONTROL)
+    directory = get_directory()
+    if directory is not None:
+        dealerships = directory.dealers if state == "All" else directory.in_state(state)
     else:
-        endpoint = "/fetchDealers/" + state
-    dealerships = get_request(endpoint) or []
-    return JsonResponse({"status": 200, "dealers": dealerships})
+        endpoint = _dealers_endpoint(state)
+        dealerships = dealer_cache.get(dealers_key(state), lambda: get_request(endpoint)) or []
+    return conditional_json(
+        request, payload_digest(dealerships),
+        lambda: {"status": 200, "dealers": dealerships}, **DEALERS_CACHE_CONTROL,
+    )
+
+
+def _dealer_details(dealer_id):
+    directory = get_directory()
+    dealer = directory.get(dealer_id) if directory is not None else None
+    if dealer is None:
+        endpoint = f"/fetchDealer/{dealer_id}"
+        dealer = dealer_cache.get(dealer_key(dealer_id), lambda: get_request(endpoint)) or {}
+    return dealer
 
 
 def get_dealer_details(request, dealer_id: int):
-    endpoint = f"/fetchDealer/{dealer_id}"
-    dealer = get_request(endpoint) or {}
-    return JsonResponse({"status": 200, "dealer": dealer})
+    dealer = _dealer_details(dealer_id)
+    return conditional_json(
+        request, payload_digest(dealer),
+        lambda: {"status": 200, "dealer": dealer}, **DEALERS_CACHE_CONTROL,
+    )
 
 
-def get_dealer_reviews(request, dealer_id: int):
-    endpoint = f"/fetchReviews/dealer/{dealer_id}"
-    reviews = get_request(endpoint) or []
+def _float_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ""):
+        return None
+    return float(value)
+
 
+NEAR_MAX_RESULTS = 500
+
+
+def get_dealers_near(request):
+    """
+    Dealers closest to a point, from the local directory's spatial index.
+    Params: lat, long (required); radius_km and/or k. With only radius_km
+    every dealer in range is returned; with k the k nearest (within
+    radius_km if given). Defaults to k=10. Each dealer gets distance_km.
+    """
+    try:
+        lat = _float_param(request, "lat")
+        lon = _float_param(request, "long")
+        radius_km = _float_param(request, "radius_km")
+        k = _int_param(request, "k")
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return JsonResponse({"status": 400, "message": "Valid lat and long required"}, status=400)
+    if radius_km is not None and radius_km < 0:
+        return JsonResponse({"status": 400, "message": "radius_km must be >= 0"}, status=400)
+    if k is None and radius_km is None:
+        k = 10
+    if k is not None:
+        k = max(1, min(k, NEAR_MAX_RESULTS))
+
+    directory = get_directory()
+    if directory is None:
+        return JsonResponse({"status": 503, "message": "Dealer directory unavailable"},
+                            status=503)
+    dealers = [
+        dict(dealer, distance_km=round(km, 2))
+        for dealer, km in directory.near(lat, lon, radius_km=radius_km, k=k)
+    ]
+    return JsonResponse({"status": 200, "dealers": dealers})
+
+
+@csrf_exempt
+def invalidate_dealer_cache(request):
+    """Staff-only POST hook: drop cached dealer data (one dealer or all)."""
+    if request.method != "POST":
+        return JsonResponse({"status": 405, "message": "POST required"}, status=405)
+    if not request.user.is_staff:
+        return JsonResponse({"status": 403, "message": "Unauthorized"}, status=403)
+    dealer_id = request.GET.get("dealer_id")
+    invalidate_dealers(int(dealer_id) if dealer_id and dealer_id.isdigit() else None)
+    invalidate_directory()
+    return JsonResponse({"status": 200, "message": "Dealer cache invalidated"})
+
+
+# Label of reviews that could not be scored (sentiment service failing,
+# its circuit open or its bulkhead full); the page is served regardless.
+SENTIMENT_UNAVAILABLE = "unavailable"
+
+
+def _sentiment_label(senti_resp):
+    """Label from a sentiment service reply: 'neutral' if it has none,
+    SENTIMENT_UNAVAILABLE if there is no reply."""
+    if senti_resp is None:
+        return SENTIMENT_UNAVAILABLE
+    return (
+        senti_resp.get("sentiment")
+        or senti_resp.get("label")
+        or senti_resp.get("sentiment_label")
+        or "neutral"
+    )
+
+
+def _score_texts(texts):
+    """
+    Score texts with as few sentiment calls as possible: one batch request
+    per chunk, then per-text calls only for whatever the batch missed
+    (e.g. a sentiment service without /analyze_batch).
+    """
+    results = analyze_review_sentiments_batch(texts)
+    missing = [i for i, res in enumerate(results) if res is None]
+    if missing:
+        retried = analyze_review_sentiments_many(texts[i] for i in missing)
+        for i, res in zip(missing, retried):
+            results[i] = res
+    return results
+
+
+def _review_texts(reviews):
+    return [r.get("review", "") or "" for r in reviews]
+
+
+def _enrich_reviews(reviews, results):
     enriched = []
-    for r in reviews:
-        review_text = r.get("review", "") or ""
-        encoded = urllib.parse.quote(review_text, safe="")
-        senti_resp = analyze_review_sentiments(encoded) or {}
-        sentiment = (
-            senti_resp.get("sentiment")
-            or senti_resp.get("label")
-            or senti_resp.get("sentiment_label")
-            or "neutral"
-        )
+    for r, senti_resp in zip(reviews, results):
         review_detail = dict(r)
-        review_detail["sentiment"] = sentiment
+        review_detail["sentiment"] = _sentiment_label(senti_resp)
         enriched.append(review_detail)
+    return enriched
+
+
+def _score_reviews(reviews):
+    """
+    Sentiment for each review: stored scores where we have them, the
+    sentiment service (results then stored) only for the rest.
+    """
+    results = stored_results(reviews)
+    missing = [i for i, res in enumerate(results) if res is None]
+    if missing:
+        scored = _score_texts(_review_texts([reviews[i] for i in missing]))
+        for i, res in zip(missing, scored):
+            results[i] = res
+        save_results((reviews[i], results[i]) for i in missing)
+    return results
+
+
+REVIEWS_PAGE_SIZE = 50
+REVIEWS_MAX_PAGE_SIZE = 500
+
+
+def _review_page_params(request):
+    """(after_id, limit) from the query string; ValueError if not numeric."""
+    limit = _int_param(request, "limit") or REVIEWS_PAGE_SIZE
+    return _int_param(request, "after_id"), max(1, min(limit, REVIEWS_MAX_PAGE_SIZE))
+
+
+def _reviews_etag(dealer_id, after_id, limit):
+    """
+    ETag of a page of a dealer's reviews, from the mirror's version of
+    the dealer (see review_mirror.version) rather than the page itself;
+    None while the mirror cannot serve.
+    """
+    if not review_mirror.ensure():
+        return None
+    return digest(["reviews", dealer_id, after_id, limit, review_mirror.version(dealer_id)])
+
+
+def _review_page(dealer_id, after_id, limit):
+    """A page of a dealer's reviews from the local mirror, or from the
+    backend (paged locally) while the mirror cannot serve."""
+    if review_mirror.ensure():
+        return review_mirror.page(dealer_id, after_id, limit)
+    reviews = get_request(f"/fetchReviews/dealer/{dealer_id}") or []
+    return review_mirror.page_of(reviews, after_id, limit)
+
+
+def _review_stream(dealer_id):
+    """All of a dealer's reviews: read from the mirror in chunks, else
+    streamed through from the backend as they are parsed."""
+    if review_mirror.ensure():
+        return review_mirror.iter_dealer(dealer_id)
+    try:
+        return _primed(stream_request(f"/fetchReviews/dealer/{dealer_id}"))
+    except Exception:
+        return iter(())
+
+
+def _scored_review_stream(reviews, batch_size=None):
+    """
+    Generator stage adding sentiment to a stream of reviews, scored
+    sentiment_batch_size at a time, so only one batch is held at once.
+    """
+    reviews = iter(reviews)
+    size = max(1, batch_size or sentiment_batch_size)
+    while True:
+        batch = list(itertools.islice(reviews, size))
+        if not batch:
+            return
+        yield from _enrich_reviews(batch, _score_reviews(batch))
+
+
+def get_dealer_reviews(request, dealer_id: int):
+    """
+    A dealer's reviews with sentiment, in id order, cursor-paginated:
+    limit (default 50) and after_id (the last id seen); the response's
+    "next" is the after_id for the following page. With stream=1 all of
+    them are sent in one streamed response instead (no paging, no ETag).
+    """
+    if _wants_stream(request):
+        return _streaming_json(request, "reviews",
+                               _scored_review_stream(_review_stream(dealer_id)),
+                               **REVIEWS_CACHE_CONTROL)
+    try:
+        after_id, limit = _review_page_params(request)
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+
+    def build():
+        reviews, next_after = _scored_review_page(dealer_id, after_id, limit)
+        return {"status": 200, "reviews": reviews, "next": next_after}
+
+    return conditional_json(request, _reviews_etag(dealer_id, after_id, limit), build,
+                            **REVIEWS_CACHE_CONTROL)
+
+
+def _scored_review_page(dealer_id, after_id, limit):
+    reviews, next_after = _review_page(dealer_id, after_id, limit)
+    return _enrich_reviews(reviews, _score_reviews(reviews)), next_after
+
+# ------------------------
+# Dealer page (composite)
+# ------------------------
+
+
+DEALER_PAGE_FIELDS = ("dealer", "reviews", "cars")
+
+
+def _dealer_page_fields(request):
+    """Parts requested with ?fields=dealer,reviews,cars (default: all)."""
+    fields = [f for f in request.GET.get("fields", "").split(",") if f]
+    unknown = set(fields) - set(DEALER_PAGE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields or list(DEALER_PAGE_FIELDS)
 
-    return JsonResponse({"status": 200, "reviews": enriched})
+
+def _dealer_cars(dealer_id):
+    return list(
+        CarModel.objects.filter(dealer_id=dealer_id).order_by("id")
+        .values("id", "name", "type", "year", "make_id", make_name=F("make__name"))
+    )
+
+
+def _dealer_page(parts):
+    """Combined document from {part: value}; reviews come as (items, next)."""
+    page = {"status": 200}
+    for field in DEALER_PAGE_FIELDS:
+        if field == "reviews" and field in parts:
+            page["reviews"], page["reviews_next"] = parts["reviews"]
+        elif field in parts:
+            page[field] = parts[field]
+    return page
+
+
+def _dealer_page_etag(fields, dealer, reviews_etag):
+    """
+    ETag of a dealer page from the versions of its parts: the dealer
+    payload's digest, the reviews ETag and the car tables' version. None
+    when the reviews are requested but have no version.
+    """
+    if "reviews" in fields and reviews_etag is None:
+        return None
+    return digest([
+        "dealer_page", fields,
+        payload_digest(dealer) if dealer is not None else None,
+        reviews_etag,
+        cars_version() if "cars" in fields else None,
+    ])
+
+
+def _in_worker(fn):
+    """fn for a pool thread: records timings into the request and closes
+    the thread's database connections when done."""
+    fn = bind(fn)
+
+    def run(*args):
+        try:
+            return fn(*args)
+        finally:
+            connections.close_all()
+    return run
+
+
+def get_dealer_page(request, dealer_id: int):
+    """
+    Everything a dealer page shows in one response: the dealer, a page of
+    its reviews with sentiment (limit/after_id as in get_dealer_reviews)
+    and its local CarModel rows. ?fields= picks a subset. The dealer
+    (usually from the local directory) is fetched first, since the ETag
+    needs it; a 304 skips the reviews and cars, which are otherwise
+    fetched in parallel.
+    """
+    try:
+        fields = _dealer_page_fields(request)
+    except ValueError as err:
+        return JsonResponse({"status": 400, "message": str(err)}, status=400)
+    try:
+        after_id, limit = _review_page_params(request)
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+
+    parts = {}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dealer = None
+        if "dealer" in fields:
+            dealer = pool.submit(_in_worker(_dealer_details), dealer_id)
+        reviews_etag = _reviews_etag(dealer_id, after_id, limit) if "reviews" in fields else None
+        if dealer is not None:
+            parts["dealer"] = dealer.result()
+        etag = _dealer_page_etag(fields, parts.get("dealer"), reviews_etag)
+
+        def build():
+            reviews = None
+            if "reviews" in fields:
+                reviews = pool.submit(_in_worker(_scored_review_page), dealer_id, after_id, limit)
+            # The local query runs here while the pool waits on upstreams.
+            if "cars" in fields:
+                parts["cars"] = _dealer_cars(dealer_id)
+            if reviews is not None:
+                parts["reviews"] = reviews.result()
+            return _dealer_page(parts)
+
+        return conditional_json(request, etag, build, **REVIEWS_CACHE_CONTROL)
+
+# ------------------------
+# Sentiment rollups (precomputed per dealer)
+# ------------------------
+
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+
+def get_dealer_sentiment(request, dealer_id: int):
+    """
+    A dealer's review counts by sentiment and mean compound score, read
+    from its rollup row rather than from the reviews.
+    """
+    summary = sentiment_rollup.summary(dealer_id)
+    return conditional_json(
+        request, digest(summary),
+        lambda: {"status": 200, "dealer_id": dealer_id, "sentiment": summary},
+        **REVIEWS_CACHE_CONTROL,
+    )
+
+
+def get_sentiment_leaderboard(request, state="All"):
+    """
+    Top dealers by mean compound score, overall or in one state (full name
+    or abbreviation), with their directory entries. Params: n (default 10,
+    max 100) and min_reviews (default 1).
+    """
+    try:
+        n = max(1, min(_int_param(request, "n") or LEADERBOARD_SIZE, LEADERBOARD_MAX_SIZE))
+        min_reviews = max(1, _int_param(request, "min_reviews") or 1)
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+    directory = get_directory()
+    key = None if state == "All" else sentiment_rollup.state_key(state, directory)
+    dealers = [
+        dict((directory.get(dealer_id) if directory is not None else None) or {"id": dealer_id},
+             sentiment=summary)
+        for dealer_id, summary in sentiment_rollup.leaderboard(key, n, min_reviews)
+    ]
+    return conditional_json(
+        request, digest(dealers),
+        lambda: {"status": 200, "dealers": dealers}, **REVIEWS_CACHE_CONTROL,
+    )
 
 # ------------------------
 # Add Review (POST)
 # ------------------------
 
 
+def _score_new_review(review):
+    """Score a just-posted review and store it; failures only get logged."""
+    try:
+        result = _score_texts(_review_texts([review]))[0]
+        save_results([(review, result)])
+    except Exception:
+        logger.exception("Could not score review %s", review.get("id"))
+
+
 @csrf_exempt
 def add_review(request):
     if request.user.is_anonymous:
@@ -116,6 +690,240 @@ def add_review(request):
         response = post_review(data)
         if response is None:
             return JsonResponse({"status": 500, "message": "Error in posting review"})
+        _score_new_review(response)
+        review_mirror.add([response])
+        return JsonResponse({"status": 200, "message": "Review posted", "result": response})
+    except Exception:
+        return JsonResponse({"status": 401, "message": "Error in posting review"})
+
+
+def _submission_status(submission):
+    return {
+        "tracking_id": str(submission.tracking_id),
+        "state": submission.status,
+        "attempts": submission.attempts,
+        "review_id": submission.review_id,
+        "last_error": submission.last_error or None,
+        "created_at": submission.created_at.isoformat(),
+        "delivered_at": submission.delivered_at.isoformat() if submission.delivered_at else None,
+        "next_attempt_at": (
+            submission.next_attempt_at.isoformat()
+            if submission.status == ReviewSubmission.PENDING else None
+        ),
+    }
+
+
+@csrf_exempt
+def submit_review(request):
+    """
+    Write-behind add_review: validate the review, spool it locally and
+    answer at once with a tracking id; a background worker delivers it.
+    """
+    if request.user.is_anonymous:
+        return JsonResponse({"status": 403, "message": "Unauthorized"})
+    if request.method != "POST":
+        return JsonResponse({"status": 405, "message": "POST required"})
+
+    try:
+        data = json.loads(request.body)
+    except Exception:
+        return JsonResponse({"status": 400, "message": "Invalid JSON body"})
+
+    errors = review_spool.validate(data)
+    if errors:
+        return JsonResponse({"status": 400, "message": "Invalid review", "errors": errors})
+
+    submission = review_spool.submit(data, user=request.user)
+    return JsonResponse({
+        "status": 202,
+        "message": "Review queued",
+        "tracking_id": str(submission.tracking_id),
+    })
+
+
+def get_review_submission(request, tracking_id):
+    """Delivery status of a spooled review, for its submitter or staff."""
+    if request.user.is_anonymous:
+        return JsonResponse({"status": 403, "message": "Unauthorized"})
+    try:
+        # From default: the row may have been written moments ago.
+        submission = ReviewSubmission.objects.using(DEFAULT_DB_ALIAS).get(
+            tracking_id=tracking_id
+        )
+    except ReviewSubmission.DoesNotExist:
+        return JsonResponse({"status": 404, "message": "Unknown submission"})
+    if submission.user_id != request.user.id and not request.user.is_staff:
+        return JsonResponse({"status": 404, "message": "Unknown submission"})
+    return JsonResponse({"status": 200, "submission": _submission_status(submission)})
+
+# ------------------------
+# Async (ASGI) variants of the proxy views
+# ------------------------
+# Same responses as the sync views above, but upstream waits yield to the
+# event loop instead of holding a worker thread. They are routed under
+# async/ so both paths can be compared under either server.
+
+
+async def get_dealerships_async(request, state="All"):
+    directory = get_directory(block=False)
+    if directory is not None:
+        dealerships = directory.dealers if state == "All" else directory.in_state(state)
+    else:
+        endpoint = _dealers_endpoint(state)
+        dealerships = await dealer_cache.aget(
+            dealers_key(state), lambda: aget_request(endpoint), lambda: get_request(endpoint)
+        ) or []
+    return conditional_json(
+        request, payload_digest(dealerships),
+        lambda: {"status": 200, "dealers": dealerships}, **DEALERS_CACHE_CONTROL,
+    )
+
+
+async def _adealer_details(dealer_id):
+    directory = get_directory(block=False)
+    dealer = directory.get(dealer_id) if directory is not None else None
+    if dealer is None:
+        endpoint = f"/fetchDealer/{dealer_id}"
+        dealer = await dealer_cache.aget(
+            dealer_key(dealer_id), lambda: aget_request(endpoint), lambda: get_request(endpoint)
+        ) or {}
+    return dealer
+
+
+async def get_dealer_details_async(request, dealer_id: int):
+    dealer = await _adealer_details(dealer_id)
+    return conditional_json(
+        request, payload_digest(dealer),
+        lambda: {"status": 200, "dealer": dealer}, **DEALERS_CACHE_CONTROL,
+    )
+
+
+async def _ascore_texts(texts):
+    """Async _score_texts()."""
+    results = await aanalyze_review_sentiments_batch(texts)
+    missing = [i for i, res in enumerate(results) if res is None]
+    if missing:
+        retried = await aanalyze_review_sentiments_many(texts[i] for i in missing)
+        for i, res in zip(missing, retried):
+            results[i] = res
+    return results
+
+
+async def _ascored_reviews(dealer_id, after_id, limit):
+    """(reviews, sentiment results, next after_id) for one page."""
+    if await sync_to_async(review_mirror.ensure)():
+        reviews, next_after = await sync_to_async(review_mirror.page)(dealer_id, after_id, limit)
+    else:
+        reviews = await aget_request(f"/fetchReviews/dealer/{dealer_id}") or []
+        reviews, next_after = review_mirror.page_of(reviews, after_id, limit)
+    results = await sync_to_async(stored_results)(reviews)
+    missing = [i for i, res in enumerate(results) if res is None]
+    if missing:
+        scored = await _ascore_texts(_review_texts([reviews[i] for i in missing]))
+        for i, res in zip(missing, scored):
+            results[i] = res
+        await sync_to_async(save_results)([(reviews[i], results[i]) for i in missing])
+    return reviews, results, next_after
+
+
+async def get_dealer_reviews_async(request, dealer_id: int):
+    try:
+        after_id, limit = _review_page_params(request)
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+    etag = await sync_to_async(_reviews_etag)(dealer_id, after_id, limit)
+    if etag is not None:
+        response = not_modified(request, etag, **REVIEWS_CACHE_CONTROL)
+        if response is not None:
+            return response
+    reviews, next_after = await _ascored_review_page(dealer_id, after_id, limit)
+    page = {"status": 200, "reviews": reviews, "next": next_after}
+    return conditional_json(request, etag, lambda: page, **REVIEWS_CACHE_CONTROL)
+
+
+async def _ascored_review_page(dealer_id, after_id, limit):
+    reviews, results, next_after = await _ascored_reviews(dealer_id, after_id, limit)
+    return _enrich_reviews(reviews, results), next_after
+
+
+async def get_dealer_page_async(request, dealer_id: int):
+    try:
+        fields = _dealer_page_fields(request)
+    except ValueError as err:
+        return JsonResponse({"status": 400, "message": str(err)}, status=400)
+    try:
+        after_id, limit = _review_page_params(request)
+    except ValueError:
+        return JsonResponse({"status": 400, "message": "Numeric parameter expected"}, status=400)
+
+    # First what the ETag needs, then (unless it matches) the rest.
+    fetches = {}
+    if "dealer" in fields:
+        fetches["dealer"] = _adealer_details(dealer_id)
+    if "reviews" in fields:
+        fetches["reviews_etag"] = sync_to_async(_reviews_etag)(dealer_id, after_id, limit)
+    found = dict(zip(fetches, await asyncio.gather(*fetches.values())))
+    parts = {"dealer": found["dealer"]} if "dealer" in found else {}
+    etag = await sync_to_async(_dealer_page_etag)(
+        fields, parts.get("dealer"), found.get("reviews_etag")
+    )
+    if etag is not None:
+        response = not_modified(request, etag, **REVIEWS_CACHE_CONTROL)
+        if response is not None:
+            return response
+
+    fetches = {}
+    if "reviews" in fields:
+        fetches["reviews"] = _ascored_review_page(dealer_id, after_id, limit)
+    if "cars" in fields:
+        fetches["cars"] = sync_to_async(_dealer_cars)(dealer_id)
+    parts.update(zip(fetches, await asyncio.gather(*fetches.values())))
+    page = _dealer_page(parts)
+    return conditional_json(request, etag, lambda: page, **REVIEWS_CACHE_CONTROL)
+
+
+@csrf_exempt
+async def add_review_async(request):
+    user = await request.auser()
+    if user.is_anonymous:
+        return JsonResponse({"status": 403, "message": "Unauthorized"})
+
+    try:
+        data = json.loads(request.body)
+    except Exception:
+        return JsonResponse({"status": 400, "message": "Invalid JSON body"})
+
+    try:
+        response = await apost_review(data)
+        if response is None:
+            return JsonResponse({"status": 500, "message": "Error in posting review"})
+        await sync_to_async(_score_new_review)(response)
+        await sync_to_async(review_mirror.add)([response])
         return JsonResponse({"status": 200, "message": "Review posted", "result": response})
     except Exception:
         return JsonResponse({"status": 401, "message": "Error in posting review"})
+
+# ------------------------
+# Metrics
+# ------------------------
+
+
+def get_upstream_state(request):
+    """Circuit breaker, bulkhead and adaptive timeout state per upstream."""
+    return JsonResponse({"status": 200, "upstreams": upstream.guard_states()})
+
+
+def get_metrics(request):
+    """Runtime counters for the caches and upstream clients."""
+    return JsonResponse({
+        "status": 200,
+        "sentiment_cache": sentiment_cache.stats(),
+        "dealer_cache": dealer_cache.stats(),
+        "upstreams": upstream.stats(),
+        "coalescing": inflight.stats(),
+        "inventory": inventory.stats(),
+        "dealer_directory": dealer_directory.stats(),
+        "review_spool": review_spool.stats(),
+        "review_mirror": review_mirror.stats(),
+        "views": instrumentation.stats(),
+    })
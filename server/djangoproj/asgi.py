@@ -3,6 +3,11 @@ ASGI config for djangoproj project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server so the async views under /djangoapp/async/ run
+on the event loop, e.g.::
+
+    gunicorn djangoproj.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
@@ -14,3 +19,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoproj.settings')
 
 application = get_asgi_application()
+
+# Deliver reviews spooled before a restart (see djangoapp.review_spool).
+from djangoapp import review_spool  # noqa: E402
+
+review_spool.start_on_boot()
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    # First, so its timings cover the whole middleware stack
+    'djangoapp.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,14 +67,100 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'djangoproj.wsgi.application'
 
-# SQLite database (lab default)
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite database (lab default). With db_tuning on (the default) every
+# connection runs in WAL mode with the pragmas below, connections persist
+# between requests, and reads go to a read-only "replica" connection (the
+# same file unless db_replica_name points at a real replica; see
+# djangoapp.db_router). db_tuning=off restores plain Django defaults.
+DB_TUNING = os.getenv('db_tuning', default='on') != 'off'
+DB_NAME = os.getenv('db_name', default=str(BASE_DIR / 'db.sqlite3'))
+
+SQLITE_PRAGMAS = ';'.join([
+    'PRAGMA journal_mode = WAL',  # readers and the writer no longer block each other
+    'PRAGMA synchronous = NORMAL',  # fsync at checkpoints only; safe with WAL
+    'PRAGMA cache_size = -20000',  # 20 MB page cache per connection
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA mmap_size = 134217728',
+])
+
+if DB_TUNING:
+    _sqlite_options = {
+        'init_command': SQLITE_PRAGMAS,
+        # Take the write lock when a transaction starts, so concurrent
+        # writers queue on busy_timeout instead of failing on upgrade.
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': float(os.getenv('db_busy_timeout', default='5')),
     }
+    _persistent = {
+        'CONN_MAX_AGE': int(os.getenv('db_conn_max_age', default='300')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': DB_NAME,
+            'OPTIONS': _sqlite_options,
+            **_persistent,
+        },
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('db_replica_name', default=DB_NAME),
+            'OPTIONS': {
+                **_sqlite_options,
+                'init_command': SQLITE_PRAGMAS + ';PRAGMA query_only = ON',
+            },
+            'TEST': {'MIRROR': 'default'},
+            **_persistent,
+        },
+    }
+    DATABASE_ROUTERS = ['djangoapp.db_router.ReadReplicaRouter']
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': DB_NAME,
+        }
+    }
+
+# Caches: "sentiment" persists sentiment results across restarts
+# (second tier behind the in-process cache in djangoapp.restapis). It is a
+# table in the app database, created after migrate (see djangoapp.apps):
+# unlike the file cache it does not list a directory on every write.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sentiment': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'djangoapp_sentiment_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    # Sessions and user lookups (db_tuning on), so a warm authenticated
+    # request does not query the database. In memory per worker process
+    # by default: a logout or password change in one worker is seen by the
+    # others once their copy expires (auth_cache_ttl). Point
+    # auth_cache_backend/auth_cache_location at memcached or redis to
+    # share one cache; DatabaseCache (table djangoapp_auth_cache) is an
+    # opt-in fallback.
+    'auth': {
+        'BACKEND': os.getenv(
+            'auth_cache_backend',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('auth_cache_location', default='djangoapp-auth'),
+        'TIMEOUT': int(os.getenv('auth_cache_ttl', default='60')),
+        # One session plus one user entry per active user
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('auth_cache_max_entries', default='20000'))},
+    },
 }
 
+if DB_TUNING:
+    # Sessions are read from the cache, written through to the database
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'auth'
+    # request.user without a query per request (see djangoapp.auth_backends)
+    AUTHENTICATION_BACKENDS = ['djangoapp.auth_backends.CachedModelBackend']
+
 # Password validation (defaults)
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -102,3 +190,29 @@ CSRF_TRUSTED_ORIGINS = [
     'http://localhost',
     'https://vintagemille-8000.theiadockernext-0-labs-prod-theiak8s-4-tor01.proxy.cognitiveclass.ai',
 ]
+
+# Logging: leveled app logs on the console; per-request timing records
+# (djangoapp.timing) as one JSON object per line.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+        'json': {'()': 'djangoapp.instrumentation.JsonLogFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'djangoapp': {
+            'handlers': ['console'],
+            'level': os.getenv('log_level', default='INFO'),
+        },
+        'djangoapp.timing': {
+            'handlers': ['timing'],
+            'level': os.getenv('timing_log_level', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
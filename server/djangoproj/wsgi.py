@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoproj.settings')
 
 application = get_wsgi_application()
+
+# Deliver reviews spooled before a restart (see djangoapp.review_spool).
+from djangoapp import review_spool  # noqa: E402
+
+review_spool.start_on_boot()
@@ -13,6 +13,7 @@ const Dealer = () => {
 
   const [dealer, setDealer] = useState({});
   const [reviews, setReviews] = useState([]);
+  const [reviewsNext, setReviewsNext] = useState(null);
   const [unreviewed, setUnreviewed] = useState(false);
   const [postReview, setPostReview] = useState(<></>)
 
@@ -20,34 +21,38 @@ const Dealer = () => {
   let root_url = curr_url.substring(0,curr_url.indexOf("dealer"));
   let params = useParams();
   let id =params.id;
-  let dealer_url = root_url+`djangoapp/dealer/${id}`;
-  let reviews_url = root_url+`djangoapp/reviews/dealer/${id}`;
+  let dealer_page_url = root_url+`djangoapp/dealer_page/${id}?fields=dealer,reviews`;
+  let reviews_url = root_url+`djangoapp/get_dealer_reviews/${id}`;
   let post_review = root_url+`postreview/${id}`;
   
-  const get_dealer = async ()=>{
-    const res = await fetch(dealer_url, {
+  // Dealer and reviews in one request (djangoapp composite endpoint)
+  const get_dealer_page = async ()=>{
+    const res = await fetch(dealer_page_url, {
       method: "GET"
     });
     const retobj = await res.json();
     
     if(retobj.status === 200) {
-      let dealerobjs = Array.from(retobj.dealer)
-      setDealer(dealerobjs[0])
+      setDealer(retobj.dealer)
+      if(retobj.reviews.length > 0){
+        setReviews(retobj.reviews)
+        setReviewsNext(retobj.reviews_next)
+      } else {
+        setUnreviewed(true);
+      }
     }
   }
 
-  const get_reviews = async ()=>{
-    const res = await fetch(reviews_url, {
+  // Reviews come in pages; "next" is the after_id of the following page
+  const get_more_reviews = async ()=>{
+    const res = await fetch(reviews_url+`?after_id=${reviewsNext}`, {
       method: "GET"
     });
     const retobj = await res.json();
-    
+
     if(retobj.status === 200) {
-      if(retobj.reviews.length > 0){
-        setReviews(retobj.reviews)
-      } else {
-        setUnreviewed(true);
-      }
+      setReviews(prev => prev.concat(retobj.reviews))
+      setReviewsNext(retobj.next)
     }
   }
 
@@ -57,8 +62,7 @@ const Dealer = () => {
   }
 
   useEffect(() => {
-    get_dealer();
-    get_reviews();
+    get_dealer_page();
     if(sessionStorage.getItem("username")) {
       setPostReview(<a href={post_review}><img src={review_icon} style={{width:'10%',marginLeft:'10px',marginTop:'10px'}} alt='Post Review'/></a>)
 
@@ -85,7 +89,10 @@ return(
           <div className="reviewer">{review.name} {review.car_make} {review.car_model} {review.car_year}</div>
         </div>
       ))}
-    </div>  
+    </div>
+    {reviewsNext !== null && reviewsNext !== undefined ? (
+      <button onClick={get_more_reviews} style={{marginTop:"10px"}}>More reviews</button>
+    ) : null}
   </div>
 )
 }